@@ -1,43 +1,261 @@
+import os
 import re
-import zipfile
-from collections import defaultdict
-
-STOPSHIP_TOKENS = ("_xlfn.", "_xludf.", "_xlpm.")
+import sys
 
-def read_zip_text(z: zipfile.ZipFile, name: str) -> str:
-    return z.read(name).decode("utf-8", errors="ignore")
+# Optional ISA-L accelerated DEFLATE: isal_zlib is a drop-in for zlib that is
+# 2-4x faster on x86. It must be in sys.modules before zipfile is imported so
+# ZipFile binds to it; stock zlib is the silent fallback.
+try:
+    from isal import isal_zlib as _isal_zlib
+    sys.modules.setdefault("zlib", _isal_zlib)
+except ImportError:
+    pass
 
-def max_row(sheet_xml: str) -> int:
-    rows = [int(m.group(1)) for m in re.finditer(r'<row[^>]*\br="(\d+)"', sheet_xml)]
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+STOPSHIP_TOKENS = (b"_xlfn.", b"_xludf.", b"_xlpm.")
+
+# Compiled once at import; every scan_* call used to pass raw pattern strings
+# through re.* and pay the cache lookup (or a recompile) per invocation.
+# Patterns are bytes: scanners run on the raw zip member, skipping the
+# full UTF-8 decode copy per sheet (scan_tablecolumn_lf already did this).
+_RE_ROW = re.compile(rb'<row[^>]*\br="(\d+)"')
+_RE_REF = re.compile(rb'^([A-Z]+)(\d+):([A-Z]+)(\d+)$')
+# Tempered cell content: after the <c ...> open tag, consume text and any
+# tag that is neither <f, a new <c, nor </c>. Unlike the old DOTALL .*? form this can
+# never cross a cell boundary hunting for a later <f>, and a sheet full of
+# formula-less cells costs linear time instead of quadratic backtracking.
+# It also matches self-closing <f .../> shells, like the cell-bounded scan.
+_RE_C_WITH_F = re.compile(
+    rb'<c\b[^>]*\br="([^"]+)"[^>]*>[^<]*(?:<(?!f\b|c\b|/c>)[^<]*)*<f\b([^>]*)>'
+)
+# Row markers and formula cells in one alternation so the shared-ref scan
+# makes a single pass over the sheet instead of one sweep per concern.
+_RE_SHEET_SCAN = re.compile(
+    rb'<row[^>]*\br="(?P<rowr>\d+)"'
+    rb'|<c\b[^>]*\br="(?P<cell>[^"]+)"[^>]*>[^<]*(?:<(?!f\b|c\b|/c>)[^<]*)*<f\b(?P<fattrs>[^>]*)>'
+)
+_RE_SI = re.compile(rb'\bsi="(\d+)"')
+_RE_REF_ATTR = re.compile(rb'\bref="([^"]+)"')
+_RE_CALC_ENTRY = re.compile(rb'<c\b[^>]*\br="([^"]+)"[^>]*\bi="(\d+)"[^>]*/>')
+# All three stopship literals as one alternation: a single C-level scan of
+# the sheet bytes replaces per-formula body extraction plus three substring
+# tests per formula.
+_RE_STOPSHIP = re.compile(rb'_xl(?:fn|udf|pm)\.')
+# A name= attribute whose value contains a newline, in one compiled scan:
+# a single search answers the gate with no Python-level find loop.
+_RE_TBL_NAME_LF = re.compile(rb'name="[^"\n\r]*[\n\r][^"]*"')
+# [^>]* on the opening tag keeps the DOTALL walk free of prefix ambiguity.
+_RE_CF_BLOCK = re.compile(rb'<conditionalFormatting\b[^>]*>.*?</conditionalFormatting>', re.DOTALL)
+
+class Ctx:
+    """
+    Per-validate() workbook context: one open ZipFile plus a memo of
+    decompressed member bytes, so each worksheet XML is inflated exactly
+    once no matter how many scanners look at it.
+    """
+    def __init__(self, z: zipfile.ZipFile):
+        self.z = z
+        self._cache = {}
+        # Indexed once: membership tests are O(1) against the frozenset and
+        # every scanner shares the same filtered part lists instead of
+        # re-filtering namelist() per call.
+        self.names = frozenset(z.namelist())
+        self.sheet_parts = tuple(sorted(
+            n for n in self.names
+            if n.startswith("xl/worksheets/sheet") and n.endswith(".xml")))
+        self.table_parts = tuple(sorted(
+            n for n in self.names
+            if n.startswith("xl/tables/table") and n.endswith(".xml")))
+
+    def read(self, name: str) -> bytes:
+        b = self._cache.get(name)
+        if b is None:
+            b = self.z.read(name)
+            self._cache[name] = b
+        return b
+
+def max_row(sheet_xml: bytes) -> int:
+    rows = [int(m.group(1)) for m in _RE_ROW.finditer(sheet_xml)]
     return max(rows) if rows else 0
 
-def cell_to_col_row(cell: str):
-    m = re.match(r'^([A-Z]+)(\d+)$', cell)
-    if not m:
+def cell_to_colnum_row(cell: bytes):
+    """
+    Parse an A1-style ref into (col_number, row_number) with a plain index
+    walk. No regex dispatch or match-object allocation per cell; this runs
+    once per formula cell and dominates the bbox loop on big sheets.
+    """
+    i = 0
+    n = len(cell)
+    col = 0
+    while i < n and 65 <= cell[i] <= 90:       # 'A'..'Z'
+        col = col * 26 + (cell[i] - 64)
+        i += 1
+    if col == 0 or i >= n:
         return None
-    return m.group(1), int(m.group(2))
-
-def col_to_num(col: str) -> int:
-    n = 0
-    for ch in col:
-        n = n * 26 + (ord(ch) - 64)
-    return n
-
-def num_to_col(n: int) -> str:
+    row = 0
+    while i < n:
+        ch = cell[i]
+        if not 48 <= ch <= 57:                 # '0'..'9'
+            return None
+        row = row * 10 + (ch - 48)
+        i += 1
+    return col, row
+
+def _num_to_col_slow(n: int) -> str:
     s = ""
     while n:
         n, r = divmod(n - 1, 26)
         s = chr(65 + r) + s
     return s
 
-def parse_ref(ref: str):
-    m = re.match(r'^([A-Z]+)(\d+):([A-Z]+)(\d+)$', ref)
+# A..ZZ (702 columns) precomputed once at import: covers every realistic
+# sheet, so the common case is a single list index instead of a divmod loop.
+_NUM_TO_COL = [""] + [_num_to_col_slow(i) for i in range(1, 703)]
+
+def num_to_col(n: int) -> str:
+    if 0 < n <= 702:
+        return _NUM_TO_COL[n]
+    return _num_to_col_slow(n)
+
+def parse_ref(ref: bytes):
+    m = _RE_REF.match(ref)
     if not m:
         return None
     c1, r1, c2, r2 = m.group(1), int(m.group(2)), m.group(3), int(m.group(4))
     return c1, r1, c2, r2
 
-def scan_shared_ref_oob_and_bbox_mismatch(xlsx_path: str):
+# NumPy is an optional accelerator for the bbox reduction: only worth the
+# array round-trip when a shared formula spans thousands of cells.
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+_NP_BBOX_THRESHOLD = 1024
+
+def _bbox_of_coords(pairs):
+    """
+    Reduce parsed (col, row) pairs to (cmin, cmax, rmin, rmax), or None if
+    empty. Callers parse cell refs once at collection time, so this reads
+    plain ints instead of re-parsing strings. Large spans go through NumPy's
+    SIMD-backed min/max; small ones use a streaming Python reduction.
+    """
+    if not pairs:
+        return None
+    if _np is not None and len(pairs) >= _NP_BBOX_THRESHOLD:
+        arr = _np.array(pairs, dtype=_np.int64)
+        cols = arr[:, 0]
+        rows = arr[:, 1]
+        return int(cols.min()), int(cols.max()), int(rows.min()), int(rows.max())
+    cmin = rmin = 1 << 30
+    cmax = rmax = -1
+    for col, row in pairs:
+        if col < cmin:
+            cmin = col
+        if col > cmax:
+            cmax = col
+        if row < rmin:
+            rmin = row
+        if row > rmax:
+            rmax = row
+    return cmin, cmax, rmin, rmax
+
+def _scan_sheet_shared(part: str, s: bytes):
+    """
+    Per-sheet shared-ref scan over raw bytes. Pure function so sheets can be
+    scanned concurrently; re releases the GIL during C-level matching.
+    """
+    oob_issues = []
+    bbox_mismatch = []
+
+    # Keyed by small int si, storing parsed (col, row) ints: no per-cell str
+    # objects survive the walk, and the bbox pass reads ints directly.
+    si_coords = defaultdict(list)  # si -> list of (col, row)
+    si_declared = {}               # si -> declared ref from base (raw bytes)
+
+    # Digit strings order by (length, bytes), so the max row is tracked
+    # without allocating an int per <row> element; int() runs once at the end.
+    mrow_key = (0, b"")
+
+    # Single traversal: track max row and shared-formula cells in one
+    # finditer instead of separate max_row + formula sweeps.
+    for m in _RE_SHEET_SCAN.finditer(s):
+        rowr = m.group("rowr")
+        if rowr is not None:
+            k = (len(rowr), rowr)
+            if k > mrow_key:
+                mrow_key = k
+            continue
+
+        cell = m.group("cell")
+        f_attrs = m.group("fattrs")
+
+        if b't="shared"' not in f_attrs:
+            continue
+
+        si_m = _RE_SI.search(f_attrs)
+        if not si_m:
+            continue
+        si = int(si_m.group(1))
+        cr = cell_to_colnum_row(cell)
+        if cr:
+            si_coords[si].append(cr)
+
+        ref_m = _RE_REF_ATTR.search(f_attrs)
+        if ref_m:
+            si_declared[si] = ref_m.group(1)
+
+    mrow = int(mrow_key[1]) if mrow_key[0] else 0
+
+    # OOB check: declared end row must not exceed sheet max row
+    # Findings decode to str only here, on the rare reporting path.
+    for si, ref in si_declared.items():
+        pr = parse_ref(ref)
+        if pr:
+            _, r1, _, r2 = pr
+            if r2 > mrow:
+                oob_issues.append((part, mrow, ref.decode("utf-8", "ignore"), str(si)))
+
+    # BBox mismatch: declared bbox must match actual bbox of all cells using that si
+    for si, coords in si_coords.items():
+        if si not in si_declared:
+            continue
+        declared = si_declared[si]
+        pr = parse_ref(declared)
+        if not pr:
+            continue
+
+        bb = _bbox_of_coords(coords)
+        if bb is None:
+            continue
+        cmin, cmax, rmin, rmax = bb
+        actual = f"{num_to_col(cmin)}{rmin}:{num_to_col(cmax)}{rmax}"
+
+        dc1, dr1, dc2, dr2 = pr
+        dnorm = f"{dc1.decode('utf-8', 'ignore')}{dr1}:{dc2.decode('utf-8', 'ignore')}{dr2}"
+
+        if actual != dnorm:
+            bbox_mismatch.append((part, str(si), dnorm, actual))
+
+    return oob_issues, bbox_mismatch
+
+# Optional native accelerator: a compiled drop-in for the per-sheet walk
+# (e.g. a Cython build of _scan_sheet_shared with the same signature and
+# return shape) can be installed as webexcel_scan_native. The pure-Python
+# function above stays the fallback and the reference implementation; this
+# tree ships no extension build of its own.
+try:
+    from webexcel_scan_native import scan_sheet_shared as _scan_sheet_shared  # noqa: F811
+except ImportError:
+    pass
+
+def _pool_size(njobs: int) -> int:
+    return max(1, min(os.cpu_count() or 1, njobs))
+
+def scan_shared_ref_oob_and_bbox_mismatch(ctx: Ctx, sheet_parts):
     """
     Returns:
       oob_issues: list[(sheet_part, sheet_max_row, ref, si)]
@@ -46,153 +264,151 @@ def scan_shared_ref_oob_and_bbox_mismatch(xlsx_path: str):
     oob_issues = []
     bbox_mismatch = []
 
-    with zipfile.ZipFile(xlsx_path, "r") as z:
-        sheet_parts = [n for n in z.namelist() if n.startswith("xl/worksheets/sheet") and n.endswith(".xml")]
-        for part in sheet_parts:
-            s = read_zip_text(z, part)
-            mrow = max_row(s)
-
-            si_cells = defaultdict(list)   # si -> list of cell refs
-            si_declared = {}               # si -> declared ref from base
-
-            # Capture cell reference for each formula block
-            for m in re.finditer(r'<c\b[^>]*\br="([^"]+)"[^>]*>.*?<f\b([^>]*)>.*?</f>', s, flags=re.DOTALL):
-                cell = m.group(1)
-                f_attrs = m.group(2)
-
-                if 't="shared"' not in f_attrs:
-                    continue
-
-                si_m = re.search(r'\bsi="(\d+)"', f_attrs)
-                if not si_m:
-                    continue
-                si = si_m.group(1)
-                si_cells[si].append(cell)
-
-                ref_m = re.search(r'\bref="([^"]+)"', f_attrs)
-                if ref_m:
-                    si_declared[si] = ref_m.group(1)
-
-            # OOB check: declared end row must not exceed sheet max row
-            for si, ref in si_declared.items():
-                pr = parse_ref(ref)
-                if pr:
-                    _, r1, _, r2 = pr
-                    if r2 > mrow:
-                        oob_issues.append((part, mrow, ref, si))
-
-            # BBox mismatch: declared bbox must match actual bbox of all cells using that si
-            for si, cells in si_cells.items():
-                if si not in si_declared:
-                    continue
-                declared = si_declared[si]
-                pr = parse_ref(declared)
-                if not pr:
-                    continue
-
-                cols = []
-                rows = []
-                for c in cells:
-                    cr = cell_to_col_row(c)
-                    if not cr:
-                        continue
-                    col, row = cr
-                    cols.append(col_to_num(col))
-                    rows.append(row)
-
-                if not cols or not rows:
-                    continue
-
-                cmin, cmax = min(cols), max(cols)
-                rmin, rmax = min(rows), max(rows)
-                actual = f"{num_to_col(cmin)}{rmin}:{num_to_col(cmax)}{rmax}"
-
-                dc1, dr1, dc2, dr2 = pr
-                dnorm = f"{dc1}{dr1}:{dc2}{dr2}"
-
-                if actual != dnorm:
-                    bbox_mismatch.append((part, si, dnorm, actual))
-
+    # ZipFile reads are not thread-safe: inflate serially (cached in ctx),
+    # then scan the independent sheet buffers concurrently.
+    blobs = [(part, ctx.read(part)) for part in sheet_parts]
+    if len(blobs) <= 1:
+        results = [_scan_sheet_shared(part, s) for part, s in blobs]
+    else:
+        with ThreadPoolExecutor(max_workers=_pool_size(len(blobs))) as ex:
+            results = list(ex.map(lambda pr: _scan_sheet_shared(*pr), blobs))
+    for oob, bbox in results:
+        oob_issues.extend(oob)
+        bbox_mismatch.extend(bbox)
     return oob_issues, bbox_mismatch
 
-def scan_calcchain_invalid(xlsx_path: str):
+def scan_calcchain_invalid(ctx: Ctx):
     """
     calcChain entries must point to existing formula cells (<c r="X"><f ...>)
     """
     invalid = []
-    with zipfile.ZipFile(xlsx_path, "r") as z:
-        if "xl/calcChain.xml" not in z.namelist():
-            return invalid
-
-        calc = read_zip_text(z, "xl/calcChain.xml")
-        entries = re.findall(r'<c\b[^>]*\br="([^"]+)"[^>]*\bi="(\d+)"[^>]*/>', calc)
-
-        for cell, i in entries:
-            sheet_part = f"xl/worksheets/sheet{i}.xml"
-            if sheet_part not in z.namelist():
-                invalid.append((sheet_part, cell, "missing_sheet_part"))
-                continue
-            s = read_zip_text(z, sheet_part)
-            pattern = rf'<c\b[^>]*\br="{re.escape(cell)}"[^>]*>.*?<f\b'
-            if not re.search(pattern, s, flags=re.DOTALL):
-                invalid.append((sheet_part, cell, "no_formula_at_target"))
+    if "xl/calcChain.xml" not in ctx.names:
+        return invalid
+
+    calc = ctx.read("xl/calcChain.xml")
+    entries = _RE_CALC_ENTRY.findall(calc)
+
+    # Group entries by sheet index: each target sheet is read and indexed
+    # once, then every entry is a set lookup. The old per-entry re.search
+    # rescanned the whole sheet (O(entries x sheet_size)) with a freshly
+    # built pattern each time.
+    by_sheet = defaultdict(list)
+    for cell, i in entries:
+        by_sheet[i].append(cell)
+
+    for i, cells in by_sheet.items():
+        sheet_part = f"xl/worksheets/sheet{i.decode('ascii')}.xml"
+        if sheet_part not in ctx.names:
+            for cell in cells:
+                invalid.append((sheet_part, cell.decode("utf-8", "ignore"), "missing_sheet_part"))
+            continue
+        s = ctx.read(sheet_part)
+        cells_with_formula = {m.group(1) for m in _RE_C_WITH_F.finditer(s)}
+        for cell in cells:
+            if cell not in cells_with_formula:
+                invalid.append((sheet_part, cell.decode("utf-8", "ignore"), "no_formula_at_target"))
 
     return invalid
 
-def scan_stopship_tokens(xlsx_path: str):
+def _scan_sheet_stopship(name: str, s: bytes, limit: int):
     hits = []
-    with zipfile.ZipFile(xlsx_path, "r") as z:
-        for name in z.namelist():
-            if name.startswith("xl/worksheets/sheet") and name.endswith(".xml"):
-                s = read_zip_text(z, name)
-                for m in re.finditer(r'<f\b[^>]*>(.*?)</f>', s, flags=re.DOTALL):
-                    ftxt = m.group(1)
-                    for tok in STOPSHIP_TOKENS:
-                        if tok in ftxt:
-                            hits.append((name, tok))
+    for m in _RE_STOPSHIP.finditer(s):
+        hits.append((name, m.group(0).decode("ascii")))
+        if len(hits) >= limit:
+            break
     return hits
 
-def scan_cf_ref_hits(xlsx_path: str):
+def scan_stopship_tokens(ctx: Ctx, sheet_parts, limit: int = 100):
+    """
+    Presence is what matters here and validate() only prints the first few
+    hits, so cap collection at `limit` instead of enumerating every token
+    occurrence in a pathologically broken workbook.
+    """
     hits = []
-    with zipfile.ZipFile(xlsx_path, "r") as z:
-        for name in z.namelist():
-            if name.startswith("xl/worksheets/sheet") and name.endswith(".xml"):
-                s = read_zip_text(z, name)
-                for m in re.finditer(r'<conditionalFormatting\b.*?</conditionalFormatting>', s, flags=re.DOTALL):
-                    block = m.group(0)
-                    if "#REF!" in block:
-                        hits.append(name)
-                        break
-    return hits
+    blobs = [(name, ctx.read(name)) for name in sheet_parts]
+    if len(blobs) <= 1:
+        for name, s in blobs:
+            hits.extend(_scan_sheet_stopship(name, s, limit - len(hits)))
+            if len(hits) >= limit:
+                break
+        return hits
+    with ThreadPoolExecutor(max_workers=_pool_size(len(blobs))) as ex:
+        for r in ex.map(lambda pr: _scan_sheet_stopship(*pr, limit), blobs):
+            hits.extend(r)
+            if len(hits) >= limit:
+                break
+    return hits[:limit]
+
+def _scan_sheet_cf(name: str, s: bytes):
+    # Two C-level substring gates: almost every sheet bails here without
+    # ever paying for the DOTALL block walk.
+    if b"#REF!" not in s or b"<conditionalFormatting" not in s:
+        return None
+    for m in _RE_CF_BLOCK.finditer(s):
+        if b"#REF!" in m.group(0):
+            return name
+    return None
+
+def scan_cf_ref_hits(ctx: Ctx, sheet_parts):
+    blobs = [(name, ctx.read(name)) for name in sheet_parts]
+    if len(blobs) <= 1:
+        results = [_scan_sheet_cf(name, s) for name, s in blobs]
+    else:
+        with ThreadPoolExecutor(max_workers=_pool_size(len(blobs))) as ex:
+            results = list(ex.map(lambda pr: _scan_sheet_cf(*pr), blobs))
+    return [name for name in results if name is not None]
+
+def _scan_sheet_all(part: str, s: bytes, stopship_limit: int):
+    oob, bbox = _scan_sheet_shared(part, s)
+    stop = _scan_sheet_stopship(part, s, stopship_limit)
+    cf = _scan_sheet_cf(part, s)
+    return oob, bbox, stop, cf
+
+def scan_all_sheets(ctx: Ctx, stopship_limit: int = 100):
+    """
+    Fused pass: all three per-sheet detectors run against the same buffer
+    while it is hot, so each sheet is inflated and handed to a worker once
+    instead of being revisited by three scanner entry points.
 
-def scan_tablecolumn_lf(xlsx_path: str):
+    Returns (oob_issues, bbox_mismatch, stopship_hits, cf_ref_hits) with the
+    same shapes as the individual scanners.
+    """
+    oob_issues, bbox_mismatch, stopship, cf_hits = [], [], [], []
+    blobs = [(part, ctx.read(part)) for part in ctx.sheet_parts]
+    if len(blobs) <= 1:
+        results = [_scan_sheet_all(part, s, stopship_limit) for part, s in blobs]
+    else:
+        with ThreadPoolExecutor(max_workers=_pool_size(len(blobs))) as ex:
+            results = list(ex.map(lambda pr: _scan_sheet_all(*pr, stopship_limit), blobs))
+    for oob, bbox, stop, cf in results:
+        oob_issues.extend(oob)
+        bbox_mismatch.extend(bbox)
+        if len(stopship) < stopship_limit:
+            stopship.extend(stop[:stopship_limit - len(stopship)])
+        if cf is not None:
+            cf_hits.append(cf)
+    return oob_issues, bbox_mismatch, stopship, cf_hits
+
+def scan_tablecolumn_lf(ctx: Ctx):
     hits = []
-    with zipfile.ZipFile(xlsx_path, "r") as z:
-        for name in z.namelist():
-            if name.startswith("xl/tables/table") and name.endswith(".xml"):
-                raw = z.read(name)  # bytes (important)
-                idx = 0
-                while True:
-                    j = raw.find(b'name="', idx)
-                    if j < 0:
-                        break
-                    j += len(b'name="')
-                    k = raw.find(b'"', j)
-                    if k < 0:
-                        break
-                    val = raw[j:k]
-                    if b"\n" in val or b"\r" in val:
-                        hits.append(name)
-                        break
-                    idx = k + 1
+    for name in ctx.table_parts:
+        raw = ctx.read(name)  # bytes (important)
+        # memchr-level prefilter: a table part with no newline byte at all
+        # cannot have one inside a name attribute, so skip the regex.
+        if b"\n" not in raw and b"\r" not in raw:
+            continue
+        if _RE_TBL_NAME_LF.search(raw):
+            hits.append(name)
     return hits
 
 def validate(xlsx_path: str):
-    oob, bbox = scan_shared_ref_oob_and_bbox_mismatch(xlsx_path)
-    calc_invalid = scan_calcchain_invalid(xlsx_path)
-    stopship = scan_stopship_tokens(xlsx_path)
-    cf_ref = scan_cf_ref_hits(xlsx_path)
-    tbl_lf = scan_tablecolumn_lf(xlsx_path)
+    # One ZipFile for the whole run: the central directory is read and parsed
+    # once instead of once per scanner, and the namelist filter runs once.
+    with zipfile.ZipFile(xlsx_path, "r") as z:
+        ctx = Ctx(z)
+        oob, bbox, stopship, cf_ref = scan_all_sheets(ctx)
+        calc_invalid = scan_calcchain_invalid(ctx)
+        tbl_lf = scan_tablecolumn_lf(ctx)
 
     print("FILE:", xlsx_path)
     print("shared_ref_oob_count:", len(oob))
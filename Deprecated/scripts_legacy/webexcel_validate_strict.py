@@ -13,15 +13,69 @@ Exit codes:
   2 = findings detected
 """
 
+import io
 import json
+import mmap
 import re
 import sys
+
+# Optional ISA-L accelerated DEFLATE: isal_zlib is a drop-in for zlib that is
+# 2-4x faster on x86. It must be in sys.modules before zipfile is imported so
+# ZipFile binds to it; stock zlib is the silent fallback.
+try:
+    from isal import isal_zlib as _isal_zlib
+    sys.modules.setdefault("zlib", _isal_zlib)
+except ImportError:
+    pass
+
+import os
 import zipfile
 import hashlib
+import multiprocessing
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from xml.etree import ElementTree as ET
-
-STOPSHIP_TOKENS = ("_xlfn.", "_xludf.", "_xlpm.")
+from xml.parsers import expat
+
+# Optional C JSON encoder for the report write; stdlib json is the fallback.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+STOPSHIP_TOKENS = (b"_xlfn.", b"_xludf.", b"_xlpm.")
+# One alternation scans all stopship tokens simultaneously, in place of a
+# substring test per token per formula body.
+_RE_STOPSHIP_TOK = re.compile(rb"_xl(?:fn|udf|pm)\.")
+
+# Compiled once at import so the scan_* hot loops don't pay re-module cache
+# lookups (or recompiles on eviction) per call.
+_RE_ROW = re.compile(rb'<row[^>]*\br="(\d+)"')
+_RE_REF = re.compile(rb"^([A-Z]+)(\d+):([A-Z]+)(\d+)$")
+_RE_C_BOUNDED = re.compile(rb'<c\b[^>]*\br="([^"]+)"[^>]*>(.*?)</c>', re.DOTALL)
+_RE_F_IN_CELL = re.compile(rb"<f\b([^>]*)>(.*?)</f>", re.DOTALL)
+_RE_F_OPEN = re.compile(rb"<f\b")
+_RE_SI = re.compile(rb'\bsi="(\d+)"')
+_RE_SI_SQ = re.compile(rb"\bsi='(\d+)'")
+_RE_REF_ATTR = re.compile(rb'\bref="([^"]+)"')
+_RE_REF_ATTR_SQ = re.compile(rb"\bref='([^']+)'")
+_RE_CALC_ENTRY = re.compile(rb'<c\b[^>]*\br="([^"]+)"[^>]*\bi="(\d+)"[^>]*/>')
+_RE_C_REF = re.compile(rb'<c\b[^>]*\br="([^"]+)"')
+_RE_F_BODY = re.compile(rb"<f\b[^>]*>(.*?)</f>", re.DOTALL)
+_RE_CF_BLOCK = re.compile(rb"<conditionalFormatting\b.*?</conditionalFormatting>", re.DOTALL)
+# A name= attribute whose value contains a newline, in one compiled scan:
+# a single search answers the gate with no Python-level find loop.
+_RE_TBL_NAME_LF = re.compile(rb'name="[^"\n\r]*[\n\r][^"]*"')
+# Styles, workbook and rels patterns are pure ASCII too, so they match on
+# raw bytes like the sheet patterns; values decode at report time.
+_RE_DXFS_COUNT = re.compile(rb'<dxfs\b[^>]*\bcount="(\d+)"')
+_RE_CFRULE_DXFID = re.compile(rb'<cfRule\b[^>]*\bdxfId="(\d+)"')
+_RE_ACTIVETAB = re.compile(rb'<workbookView\b[^>]*\bactiveTab="(\d+)"')
+_RE_SHEET_DECL = re.compile(rb'<sheet\b[^>]*\bname="([^"]+)"[^>]*\br:id="([^"]+)"[^>]*/>')
+_RE_RELATIONSHIP_TAG = re.compile(rb'<Relationship\b[^>]*?>')
+_RE_TARGET = re.compile(rb'\bTarget="([^"]+)"')
+_RE_TARGET_SQ = re.compile(rb"\bTarget='([^']+)'")
+_RE_REL_ID = re.compile(rb'\bId="([^"]+)"')
 
 # ---------- helpers ----------
 
@@ -38,47 +92,97 @@ def read_zip_text(z: zipfile.ZipFile, name: str) -> str:
 def is_xml(name: str) -> bool:
     return name.lower().endswith(".xml")
 
+class ZipCache:
+    """
+    Per-validate() view of the workbook: the member list is materialized
+    once (names in archive order for deterministic iteration, a frozenset
+    for O(1) membership) and decompressed bytes are memoized per part, so
+    each member is inflated at most once no matter how many scanners look
+    at it. str decode is lazy and memoized separately.
+    """
+    def __init__(self, z: zipfile.ZipFile):
+        self.z = z
+        self.names = z.namelist()
+        self.name_set = frozenset(self.names)
+        # Partition the member list once; every scanner walks the slice it
+        # cares about instead of re-filtering the full namelist.
+        self.xml_parts = [n for n in self.names if is_xml(n)]
+        self.sheet_parts = [n for n in self.xml_parts
+                            if n.startswith("xl/worksheets/sheet") and n.endswith(".xml")]
+        self.table_parts = [n for n in self.xml_parts
+                            if n.startswith("xl/tables/table") and n.endswith(".xml")]
+        self.rels_parts = [n for n in self.names if n.endswith(".rels")]
+        self._raw = {}
+        self._text = {}
+
+    def raw(self, name: str) -> bytes:
+        b = self._raw.get(name)
+        if b is None:
+            b = self.z.read(name)
+            self._raw[name] = b
+        return b
+
+    def text(self, name: str) -> str:
+        t = self._text.get(name)
+        if t is None:
+            t = self.raw(name).decode("utf-8", errors="ignore")
+            self._text[name] = t
+        return t
+
 def safe_parse_xml(name: str, raw: bytes):
     """
     Parse XML just to verify well-formedness.
     NOTE: We never write XML back. Parsing is read-only.
     """
+    # Zero-callback expat parse: with no handlers registered the C parser
+    # validates syntax without building a tree or allocating an element
+    # object per tag; raw bytes go in whole so expat reuses one buffer.
     try:
-        # ET can choke on some namespaces if bytes include leading BOM; decode->encode stabilizes.
-        text = raw.decode("utf-8", errors="ignore")
-        ET.fromstring(text)
+        expat.ParserCreate().Parse(raw, True)
         return None
     except Exception as e:
         return f"{type(e).__name__}: {e}"
 
+# Bytes legal in XML 1.0 content: everything >= 0x20 plus TAB/LF/CR.
+# Deleting this set from a buffer leaves only the illegal bytes.
+_XML_ALLOWED = bytes(i for i in range(256) if i >= 0x20 or i in (0x09, 0x0A, 0x0D))
+
 def find_illegal_xml_control_chars(raw: bytes):
     """
     XML 1.0 disallows most control chars except TAB(0x09), LF(0x0A), CR(0x0D).
     """
+    # Common case: one C-level translate pass over a 256-entry table instead
+    # of a Python loop per byte; clean buffers never enumerate at all.
+    illegal = raw.translate(None, _XML_ALLOWED)
+    if not illegal:
+        return []
+    # Rare case: translate preserves order, so the residue holds the first
+    # illegal bytes in buffer order; recover each offset with a cursor-based
+    # find per byte value instead of walking the buffer in Python.
     bad = []
-    for i, b in enumerate(raw):
-        if b < 0x20 and b not in (0x09, 0x0A, 0x0D):
-            bad.append((i, b))
-            if len(bad) >= 20:
-                break
+    next_from = {}
+    for b in illegal[:20]:
+        i = raw.find(b, next_from.get(b, 0))
+        bad.append((i, b))
+        next_from[b] = i + 1
     return bad
 
-def parse_rels_targets(rels_xml: str):
+def parse_rels_targets(rels_xml: bytes):
     """
-    Return list of Target paths from a .rels part.
+    Return list of Target paths (str) from a .rels part.
     Handles TargetMode="External" by skipping.
     """
     targets = []
     # Keep it simple: regex parse is sufficient for targets.
-    for m in re.finditer(r'<Relationship\b[^>]*?>', rels_xml):
+    for m in _RE_RELATIONSHIP_TAG.finditer(rels_xml):
         tag = m.group(0)
-        if 'TargetMode="External"' in tag or "TargetMode='External'" in tag:
+        if b'TargetMode="External"' in tag or b"TargetMode='External'" in tag:
             continue
-        tm = re.search(r'\bTarget="([^"]+)"', tag)
+        tm = _RE_TARGET.search(tag)
         if not tm:
-            tm = re.search(r"\bTarget='([^']+)'", tag)
+            tm = _RE_TARGET_SQ.search(tag)
         if tm:
-            targets.append(tm.group(1))
+            targets.append(tm.group(1).decode("utf-8", "ignore"))
     return targets
 
 def norm_target(base_part: str, target: str) -> str:
@@ -108,81 +212,266 @@ def norm_target(base_part: str, target: str) -> str:
 
 # ---------- gates from your workflow, plus a few strict ones ----------
 
-def scan_stopship_tokens(z: zipfile.ZipFile):
-    hits = []
-    for name in z.namelist():
-        if name.startswith("xl/worksheets/sheet") and name.endswith(".xml"):
-            s = read_zip_text(z, name)
-            for m in re.finditer(r"<f\b[^>]*>(.*?)</f>", s, flags=re.DOTALL):
-                ftxt = m.group(1)
-                for tok in STOPSHIP_TOKENS:
-                    if tok in ftxt:
-                        hits.append({"part": name, "token": tok})
-    return hits
-
-def scan_cf_ref_hits(z: zipfile.ZipFile):
+def _scan_sheet_stopship(name: str, raw: bytes, limit: int):
     hits = []
-    for name in z.namelist():
-        if name.startswith("xl/worksheets/sheet") and name.endswith(".xml"):
-            s = read_zip_text(z, name)
-            for m in re.finditer(r"<conditionalFormatting\b.*?</conditionalFormatting>", s, flags=re.DOTALL):
-                if "#REF!" in m.group(0):
-                    hits.append({"part": name})
-                    break
+    # All three tokens share the _xl prefix: one C-level substring test
+    # vetoes the per-formula walk on clean sheets.
+    if b"_xl" not in raw:
+        return hits
+    for m in _RE_F_BODY.finditer(raw):
+        ftxt = m.group(1)
+        # dict.fromkeys keeps one hit per distinct token per body, as the
+        # old per-token loop did.
+        for tok in dict.fromkeys(_RE_STOPSHIP_TOK.findall(ftxt)):
+            hits.append({"part": name, "token": tok.decode("ascii")})
+            if len(hits) >= limit:
+                return hits
     return hits
 
-def scan_tablecolumn_lf(z: zipfile.ZipFile):
+def scan_stopship_tokens(cache: ZipCache, limit: int = 100):
+    # Presence is what matters and the report samples only the first few
+    # hits, so stop collecting at `limit` rather than enumerating every
+    # occurrence in a pathologically broken workbook.
     hits = []
-    for name in z.namelist():
-        if name.startswith("xl/tables/table") and name.endswith(".xml"):
-            raw = read_zip_bytes(z, name)
-            idx = 0
-            while True:
-                j = raw.find(b'name="', idx)
-                if j < 0:
-                    break
-                j += len(b'name="')
-                k = raw.find(b'"', j)
-                if k < 0:
-                    break
-                val = raw[j:k]
-                if b"\n" in val or b"\r" in val:
-                    hits.append({"part": name})
-                    break
-                idx = k + 1
+    for name in cache.sheet_parts:
+        hits.extend(_scan_sheet_stopship(name, cache.raw(name), limit - len(hits)))
+        if len(hits) >= limit:
+            break
     return hits
 
-def max_row(sheet_xml: str) -> int:
-    rows = [int(m.group(1)) for m in re.finditer(r'<row[^>]*\br="(\d+)"', sheet_xml)]
-    return max(rows) if rows else 0
+def _local(tag) -> str:
+    """Strip the namespace from an ElementTree tag."""
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else tag
 
-def cell_to_col_row(cell: str):
-    m = re.match(r"^([A-Z]+)(\d+)$", cell)
-    if not m:
+def _scan_sheet_cf(name: str, raw: bytes):
+    # Two C-level substring gates: sheets without both a CF block and a
+    # #REF! token skip the XML walk entirely.
+    if b"#REF!" not in raw or b"<conditionalFormatting" not in raw:
         return None
-    return m.group(1), int(m.group(2))
-
-def col_to_num(col: str) -> int:
+    # Streaming SAX walk: no DOTALL .*? sweep over the whole sheet just to
+    # bound each conditionalFormatting block.
+    try:
+        for _, el in ET.iterparse(io.BytesIO(raw), events=("end",)):
+            # Clear only processed containers: child end-events fire first,
+            # so clearing every element would empty the block before we
+            # inspect it.
+            tag = _local(el.tag)
+            if tag == "conditionalFormatting":
+                if b"#REF!" in ET.tostring(el):
+                    return {"part": name}
+                el.clear()
+            elif tag == "row":
+                el.clear()
+    except ET.ParseError:
+        # Malformed sheets are reported by scan_xml_wellformed.
+        pass
+    return None
+
+def scan_cf_ref_hits(cache: ZipCache, sample_cap: int = 25):
+    n = 0
+    hits = []
+    for name in cache.sheet_parts:
+        hit = _scan_sheet_cf(name, cache.raw(name))
+        if hit is not None:
+            n += 1
+            if len(hits) < sample_cap:
+                hits.append(hit)
+    return n, hits
+
+def scan_tablecolumn_lf(cache: ZipCache, sample_cap: int = 25):
     n = 0
-    for ch in col:
-        n = n * 26 + (ord(ch) - 64)
-    return n
+    hits = []
+    for name in cache.table_parts:
+        raw = cache.raw(name)
+        # memchr-level prefilters: no tableColumn element, or no newline
+        # byte at all, means nothing the regex could match; skip it.
+        if b"<tableColumn" not in raw:
+            continue
+        if b"\n" not in raw and b"\r" not in raw:
+            continue
+        if _RE_TBL_NAME_LF.search(raw):
+            n += 1
+            if len(hits) < sample_cap:
+                hits.append({"part": name})
+    return n, hits
+
+def max_row(sheet_xml: bytes) -> int:
+    rows = [int(m.group(1)) for m in _RE_ROW.finditer(sheet_xml)]
+    return max(rows) if rows else 0
 
-def num_to_col(n: int) -> str:
+def cell_to_colnum_row(cell: bytes):
+    """
+    Parse an A1-style ref into (col_number, row_number) with a plain index
+    walk; avoids a regex match plus group allocation per formula cell.
+    """
+    i = 0
+    n = len(cell)
+    col = 0
+    while i < n and 65 <= cell[i] <= 90:       # 'A'..'Z'
+        col = col * 26 + (cell[i] - 64)
+        i += 1
+    if col == 0 or i >= n:
+        return None
+    row = 0
+    while i < n:
+        ch = cell[i]
+        if not 48 <= ch <= 57:                 # '0'..'9'
+            return None
+        row = row * 10 + (ch - 48)
+        i += 1
+    return col, row
+
+def _num_to_col_slow(n: int) -> str:
     s = ""
     while n:
         n, r = divmod(n - 1, 26)
         s = chr(65 + r) + s
     return s
 
-def parse_ref(ref: str):
-    m = re.match(r"^([A-Z]+)(\d+):([A-Z]+)(\d+)$", ref)
+# A..ZZ (702 columns) precomputed once at import: covers every realistic
+# sheet, so the common case is a single list index instead of a divmod loop.
+_NUM_TO_COL = [""] + [_num_to_col_slow(i) for i in range(1, 703)]
+
+def num_to_col(n: int) -> str:
+    if 0 < n <= 702:
+        return _NUM_TO_COL[n]
+    return _num_to_col_slow(n)
+
+def parse_ref(ref: bytes):
+    m = _RE_REF.match(ref)
     if not m:
         return None
     c1, r1, c2, r2 = m.group(1), int(m.group(2)), m.group(3), int(m.group(4))
     return c1, r1, c2, r2
 
-def scan_shared_ref_oob_and_bbox_mismatch_cellbounded(z: zipfile.ZipFile):
+# NumPy is an optional accelerator for the bbox reduction: only worth the
+# array round-trip when a shared formula spans thousands of cells.
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+_NP_BBOX_THRESHOLD = 1024
+
+def _bbox_of_coords(pairs):
+    """
+    Reduce parsed (col, row) pairs to (cmin, cmax, rmin, rmax), or None if
+    empty. Callers parse cell refs once at collection time, so this reads
+    plain ints instead of re-parsing strings. Large spans go through NumPy's
+    SIMD-backed min/max; small ones use a streaming Python reduction.
+    """
+    if not pairs:
+        return None
+    if _np is not None and len(pairs) >= _NP_BBOX_THRESHOLD:
+        arr = _np.array(pairs, dtype=_np.int64)
+        cols = arr[:, 0]
+        rows = arr[:, 1]
+        return int(cols.min()), int(cols.max()), int(rows.min()), int(rows.max())
+    cmin = rmin = 1 << 30
+    cmax = rmax = -1
+    for col, row in pairs:
+        if col < cmin:
+            cmin = col
+        if col > cmax:
+            cmax = col
+        if row < rmin:
+            rmin = row
+        if row > rmax:
+            rmax = row
+    return cmin, cmax, rmin, rmax
+
+def _scan_sheet_shared(part: str, raw: bytes, sample_cap: int = 25):
+    """
+    Per-sheet half of the shared-ref gate; returns ((oob_count, oob_samples),
+    (bbox_count, bbox_samples)) for one worksheet buffer. Counts are exact;
+    only the first sample_cap finding dicts are materialized, since the
+    report never shows more than that.
+    """
+    oob = []
+    bbox = []
+    mrow = 0
+    # Keyed by small int si, storing parsed (col, row) ints: no per-cell
+    # str objects survive the walk and the bbox pass reads ints directly.
+    si_coords = defaultdict(list)  # si -> [(col, row)]
+    si_declared = {}               # si -> declared ref bbox (base, bytes)
+
+    # Streaming SAX walk over the sheet: cell boundaries come from the
+    # parser, so there is no DOTALL .*? regex hunting for </c> and no
+    # quadratic-backtracking risk; rows and cells come out of one pass.
+    try:
+        for _, el in ET.iterparse(io.BytesIO(raw), events=("end",)):
+            tag = _local(el.tag)
+            if tag == "c":
+                cell = el.get("r")
+                if cell is None:
+                    continue
+                for child in el:
+                    if _local(child.tag) == "f":
+                        if child.get("t") != "shared":
+                            break
+                        si = child.get("si")
+                        if si is None or not si.isdigit():
+                            break
+                        si_i = int(si)
+                        cr = cell_to_colnum_row(cell.encode("utf-8"))
+                        if cr:
+                            si_coords[si_i].append(cr)
+                        ref = child.get("ref")
+                        if ref is not None:
+                            si_declared[si_i] = ref.encode("utf-8")
+                        break
+            elif tag == "row":
+                r = el.get("r")
+                if r is not None and r.isdigit():
+                    ri = int(r)
+                    if ri > mrow:
+                        mrow = ri
+                el.clear()
+    except ET.ParseError:
+        # Malformed sheets are reported by scan_xml_wellformed; keep
+        # whatever was collected before the parse failed.
+        pass
+
+    # Findings decode to str only here, on the reporting path.
+    oob_n = 0
+    for si, ref in si_declared.items():
+        pr = parse_ref(ref)
+        if pr:
+            _, r1, _, r2 = pr
+            if r2 > mrow:
+                oob_n += 1
+                if len(oob) < sample_cap:
+                    oob.append({"part": part, "sheet_max_row": mrow,
+                                "ref": ref.decode("utf-8", "ignore"),
+                                "si": str(si)})
+
+    bbox_n = 0
+    for si, coords in si_coords.items():
+        if si not in si_declared:
+            continue
+        declared = si_declared[si]
+        pr = parse_ref(declared)
+        if not pr:
+            continue
+
+        bb = _bbox_of_coords(coords)
+        if bb is None:
+            continue
+        cmin, cmax, rmin, rmax = bb
+        actual = f"{num_to_col(cmin)}{rmin}:{num_to_col(cmax)}{rmax}"
+
+        dc1, dr1, dc2, dr2 = pr
+        dnorm = f"{dc1.decode('utf-8', 'ignore')}{dr1}:{dc2.decode('utf-8', 'ignore')}{dr2}"
+
+        if actual != dnorm:
+            bbox_n += 1
+            if len(bbox) < sample_cap:
+                bbox.append({"part": part, "si": str(si),
+                             "declared_ref": dnorm, "actual_ref": actual})
+
+    return (oob_n, oob), (bbox_n, bbox)
+
+def scan_shared_ref_oob_and_bbox_mismatch_cellbounded(cache: ZipCache, sample_cap: int = 25):
     """
     Cell-bounded version:
       - Identify each <c r="X"> ... </c>
@@ -194,180 +483,296 @@ def scan_shared_ref_oob_and_bbox_mismatch_cellbounded(z: zipfile.ZipFile):
           * OOB: declared ref end row <= max row
           * BBox: declared ref bbox equals actual bbox over all cells using that si in that sheet
     """
-    oob = []
-    bbox = []
-
-    sheet_parts = [n for n in z.namelist() if n.startswith("xl/worksheets/sheet") and n.endswith(".xml")]
-    for part in sheet_parts:
-        s = read_zip_text(z, part)
-        mrow = max_row(s)
-
-        si_cells = defaultdict(list)  # si -> [cell refs]
-        si_declared = {}              # si -> declared ref bbox (base)
-
-        # Iterate cells bounded by </c>
-        for cm in re.finditer(r'<c\b[^>]*\br="([^"]+)"[^>]*>(.*?)</c>', s, flags=re.DOTALL):
-            cell = cm.group(1)
-            inner = cm.group(2)
-            fm = re.search(r"<f\b([^>]*)>(.*?)</f>", inner, flags=re.DOTALL)
-            if not fm:
-                continue
-            f_attrs = fm.group(1)
-            if 't="shared"' not in f_attrs and "t='shared'" not in f_attrs:
-                continue
-            sim = re.search(r'\bsi="(\d+)"', f_attrs) or re.search(r"\bsi='(\d+)'", f_attrs)
-            if not sim:
-                continue
-            si = sim.group(1)
-            si_cells[si].append(cell)
-            refm = re.search(r'\bref="([^"]+)"', f_attrs) or re.search(r"\bref='([^']+)'", f_attrs)
-            if refm:
-                si_declared[si] = refm.group(1)
-
-        for si, ref in si_declared.items():
-            pr = parse_ref(ref)
-            if pr:
-                _, r1, _, r2 = pr
-                if r2 > mrow:
-                    oob.append({"part": part, "sheet_max_row": mrow, "ref": ref, "si": si})
-
-        for si, cells in si_cells.items():
-            if si not in si_declared:
-                continue
-            declared = si_declared[si]
-            pr = parse_ref(declared)
-            if not pr:
-                continue
-
-            cols = []
-            rows = []
-            for c in cells:
-                cr = cell_to_col_row(c)
-                if not cr:
-                    continue
-                col, row = cr
-                cols.append(col_to_num(col))
-                rows.append(row)
-            if not cols or not rows:
-                continue
-
-            cmin, cmax = min(cols), max(cols)
-            rmin, rmax = min(rows), max(rows)
-            actual = f"{num_to_col(cmin)}{rmin}:{num_to_col(cmax)}{rmax}"
-
-            dc1, dr1, dc2, dr2 = pr
-            dnorm = f"{dc1}{dr1}:{dc2}{dr2}"
+    oob_n, bbox_n = 0, 0
+    oob, bbox = [], []
+    for part in cache.sheet_parts:
+        (on, os_), (bn, bs) = _scan_sheet_shared(part, cache.raw(part), sample_cap)
+        oob_n += on
+        bbox_n += bn
+        oob.extend(os_[:sample_cap - len(oob)])
+        bbox.extend(bs[:sample_cap - len(bbox)])
+    return (oob_n, oob), (bbox_n, bbox)
+
+def _index_sheet_cells(raw: bytes):
+    """
+    One streaming pass over a sheet: {cell ref -> has <f> child}. Returns
+    None if the sheet is not well-formed (that is reported by
+    scan_xml_wellformed); callers fall back to the regex index.
+    """
+    d = {}
+    try:
+        for _, el in ET.iterparse(io.BytesIO(raw), events=("end",)):
+            tag = _local(el.tag)
+            if tag == "c":
+                r = el.get("r")
+                if r is not None:
+                    has_f = False
+                    for child in el:
+                        if _local(child.tag) == "f":
+                            has_f = True
+                            break
+                    d[r] = has_f
+            elif tag == "row":
+                el.clear()
+    except ET.ParseError:
+        return None
+    return d
 
-            if actual != dnorm:
-                bbox.append({"part": part, "si": si, "declared_ref": dnorm, "actual_ref": actual})
+# Worksheet part names for the calcChain sheet indexes, built once:
+# workbooks rarely exceed a few dozen sheets, so the common case is a
+# plain list index instead of an f-string format per sheet group.
+_SHEET_PART_BY_IDX = tuple(f"xl/worksheets/sheet{k}.xml" for k in range(256))
 
-    return oob, bbox
+def _sheet_part_for_idx(i: str) -> str:
+    k = int(i)
+    if 0 <= k < len(_SHEET_PART_BY_IDX):
+        return _SHEET_PART_BY_IDX[k]
+    return f"xl/worksheets/sheet{k}.xml"
 
-def scan_calcchain_invalid_cellbounded(z: zipfile.ZipFile):
+def scan_calcchain_invalid_cellbounded(cache: ZipCache, sample_cap: int = 25):
+    n = 0
     invalid = []
-    if "xl/calcChain.xml" not in z.namelist():
-        return invalid
+    if "xl/calcChain.xml" not in cache.name_set:
+        return n, invalid
 
-    calc = read_zip_text(z, "xl/calcChain.xml")
-    entries = re.findall(r'<c\b[^>]*\br="([^"]+)"[^>]*\bi="(\d+)"[^>]*/>', calc)
+    calc = cache.raw("xl/calcChain.xml")
 
-    for cell, i in entries:
-        sheet_part = f"xl/worksheets/sheet{i}.xml"
-        if sheet_part not in z.namelist():
-            invalid.append({"sheet_part": sheet_part, "cell": cell, "reason": "missing_sheet_part"})
+    # Stream the entries and group them by sheet index: calcChain can hold
+    # hundreds of thousands of <c/> rows, and findall would materialize one
+    # tuple per row before any of them is checked. Each target sheet is then
+    # read and indexed once, and every entry becomes a dict lookup.
+    by_sheet = defaultdict(list)  # sheet index -> [cell refs]
+    try:
+        for _, el in ET.iterparse(io.BytesIO(calc), events=("end",)):
+            if _local(el.tag) == "c":
+                cell = el.get("r")
+                i = el.get("i")
+                if cell is not None and i is not None:
+                    by_sheet[i].append(cell)
+                el.clear()
+    except ET.ParseError:
+        # Malformed calcChain is reported by scan_xml_wellformed; fall back
+        # to the regex walk for whatever can still be matched.
+        by_sheet.clear()
+        for cell_b, i_b in _RE_CALC_ENTRY.findall(calc):
+            by_sheet[i_b.decode("ascii")].append(cell_b.decode("utf-8", "ignore"))
+
+    for i, cells in by_sheet.items():
+        sheet_part = _sheet_part_for_idx(i)
+        if sheet_part not in cache.name_set:
+            n += len(cells)
+            for cell in cells[:sample_cap - len(invalid)]:
+                invalid.append({"sheet_part": sheet_part, "cell": cell,
+                                "reason": "missing_sheet_part"})
             continue
-        s = read_zip_text(z, sheet_part)
-        # Cell-bounded check: look for <c r="cell"> ... <f ...> inside that cell.
-        pat = rf'<c\b[^>]*\br="{re.escape(cell)}"[^>]*>(.*?)</c>'
-        m = re.search(pat, s, flags=re.DOTALL)
-        if not m:
-            invalid.append({"sheet_part": sheet_part, "cell": cell, "reason": "missing_cell"})
+        s = cache.raw(sheet_part)
+        # A sheet with no "<f" byte anywhere cannot satisfy any calcChain
+        # entry: a presence-only regex index is enough to pick between the
+        # two failure reasons, skipping the streaming parse.
+        if b"<f" not in s:
+            present = set(_RE_C_REF.findall(s))
+            for cell in cells:
+                n += 1
+                if len(invalid) < sample_cap:
+                    reason = ("no_formula_at_target"
+                              if cell.encode("utf-8") in present else "missing_cell")
+                    invalid.append({"sheet_part": sheet_part, "cell": cell,
+                                    "reason": reason})
             continue
-        inner = m.group(1)
-        if not re.search(r"<f\b", inner):
-            invalid.append({"sheet_part": sheet_part, "cell": cell, "reason": "no_formula_at_target"})
-    return invalid
+        # Cell-bounded check: one streaming parse indexes every cell; each
+        # entry is then an O(1) lookup, with no DOTALL sweep per sheet.
+        index = _index_sheet_cells(s)
+        if index is None:
+            # Malformed sheet: fall back to the regex cell index.
+            index = {m.group(1).decode("utf-8", "ignore"):
+                     _RE_F_OPEN.search(m.group(2)) is not None
+                     for m in _RE_C_BOUNDED.finditer(s)}
+        for cell in cells:
+            has_f = index.get(cell)
+            if has_f is None:
+                reason = "missing_cell"
+            elif not has_f:
+                reason = "no_formula_at_target"
+            else:
+                continue
+            n += 1
+            if len(invalid) < sample_cap:
+                invalid.append({"sheet_part": sheet_part, "cell": cell,
+                                "reason": reason})
+    return n, invalid
+
+def _pool_size(njobs: int) -> int:
+    return max(1, min(os.cpu_count() or 1, njobs))
 
-def scan_xml_wellformed(z: zipfile.ZipFile):
+def scan_xml_wellformed(cache: ZipCache, sample_cap: int = 10):
+    n = 0
     bad = []
-    for name in z.namelist():
-        if is_xml(name):
-            raw = read_zip_bytes(z, name)
-            err = safe_parse_xml(name, raw)
-            if err:
+    # Inflate serially (ZipFile reads are not thread-safe, and the cache
+    # memoizes them), then parse the independent buffers concurrently:
+    # expat does its validation in C without holding the GIL.
+    blobs = [(name, cache.raw(name)) for name in cache.xml_parts]
+    if len(blobs) <= 1:
+        results = [(name, safe_parse_xml(name, raw)) for name, raw in blobs]
+    else:
+        with ThreadPoolExecutor(max_workers=_pool_size(len(blobs))) as ex:
+            results = list(ex.map(lambda pr: (pr[0], safe_parse_xml(*pr)), blobs))
+    for name, err in results:
+        if err:
+            n += 1
+            if len(bad) < sample_cap:
                 bad.append({"part": name, "error": err})
-    return bad
+    return n, bad
 
-def scan_illegal_control_chars(z: zipfile.ZipFile):
+def scan_illegal_control_chars(cache: ZipCache, sample_cap: int = 10):
+    n = 0
     bad = []
-    for name in z.namelist():
-        if is_xml(name):
-            raw = read_zip_bytes(z, name)
-            hits = find_illegal_xml_control_chars(raw)
-            if hits:
+    # Same serial-inflate / parallel-scan split as scan_xml_wellformed.
+    blobs = [(name, cache.raw(name)) for name in cache.xml_parts]
+    if len(blobs) <= 1:
+        results = [(name, find_illegal_xml_control_chars(raw)) for name, raw in blobs]
+    else:
+        with ThreadPoolExecutor(max_workers=_pool_size(len(blobs))) as ex:
+            results = list(ex.map(lambda pr: (pr[0], find_illegal_xml_control_chars(pr[1])), blobs))
+    for name, hits in results:
+        if hits:
+            n += 1
+            if len(bad) < sample_cap:
                 bad.append({"part": name, "examples": hits})
-    return bad
+    return n, bad
 
-def scan_rels_missing_targets(z: zipfile.ZipFile):
+def scan_rels_missing_targets(cache: ZipCache, sample_cap: int = 20):
+    n = 0
     missing = []
-    all_parts = set(z.namelist())
-    rels_parts = [n for n in z.namelist() if n.endswith(".rels")]
+    all_parts = cache.name_set
+    rels_parts = cache.rels_parts
     for rels in rels_parts:
-        rels_xml = read_zip_text(z, rels)
+        rels_xml = cache.raw(rels)
         for t in parse_rels_targets(rels_xml):
             target_part = norm_target(rels, t)
             if target_part not in all_parts:
-                missing.append({"rels": rels, "target": t, "resolved": target_part})
-    return missing
+                n += 1
+                if len(missing) < sample_cap:
+                    missing.append({"rels": rels, "target": t, "resolved": target_part})
+    return n, missing
 
-def scan_styles_dxf_integrity(z: zipfile.ZipFile):
+def _styles_dxf_state(cache: ZipCache):
     """
-    Check:
-      - styles.xml exists
-      - dxfs/@count matches number of <dxf> children
-      - all cfRule dxfId values are within [0, dxf_count-1]
+    Styles-part half of the dxf integrity gate. Returns (issues, dxf_count);
+    dxf_count is None when styles.xml is missing, in which case the
+    per-sheet cfRule checks are skipped (as before).
     """
-    issues = []
-    if "xl/styles.xml" not in z.namelist():
-        return [{"part": "xl/styles.xml", "issue": "missing_styles"}]
+    if "xl/styles.xml" not in cache.name_set:
+        return [{"part": "xl/styles.xml", "issue": "missing_styles"}], None
 
-    styles_raw = read_zip_bytes(z, "xl/styles.xml")
-    styles_txt = styles_raw.decode("utf-8", errors="ignore")
+    styles_raw = cache.raw("xl/styles.xml")
 
-    # Count actual <dxf> tags
-    actual = len(re.findall(r"<dxf\b", styles_txt))
-    m = re.search(r"<dxfs\b[^>]*\bcount=\"(\d+)\"", styles_txt)
+    # Count actual <dxf> tags: three C-level substring counts instead of
+    # a regex sweep (\b after "dxf" can only be ' ', '>' or '/').
+    actual = (styles_raw.count(b"<dxf ") + styles_raw.count(b"<dxf>")
+              + styles_raw.count(b"<dxf/>"))
+    m = _RE_DXFS_COUNT.search(styles_raw)
     declared = int(m.group(1)) if m else None
 
+    issues = []
     if declared is not None and declared != actual:
         issues.append({"part": "xl/styles.xml", "issue": "dxfs_count_mismatch", "declared": declared, "actual": actual})
+    return issues, actual
 
-    dxf_count = actual
+def _scan_sheet_cfrule_dxfid(name: str, raw: bytes, dxf_count: int, sample_cap: int = 25):
+    n = 0
+    issues = []
+    # C-level substring veto: most sheets carry no conditional formatting.
+    if b"<cfRule" not in raw:
+        return n, issues
+    for m2 in _RE_CFRULE_DXFID.finditer(raw):
+        did = int(m2.group(1))
+        if did < 0 or did >= dxf_count:
+            n += 1
+            if len(issues) < sample_cap:
+                issues.append({"part": name, "issue": "cf_dxfId_out_of_range", "dxfId": did, "dxf_count": dxf_count})
+    return n, issues
+
+def scan_styles_dxf_integrity(cache: ZipCache, sample_cap: int = 25):
+    """
+    Check:
+      - styles.xml exists
+      - dxfs/@count matches number of <dxf> children
+      - all cfRule dxfId values are within [0, dxf_count-1]
+    """
+    issues, dxf_count = _styles_dxf_state(cache)
+    n = len(issues)
+    if dxf_count is None:
+        return n, issues
 
     # Scan all sheets for dxfId usage in cfRules
-    for name in z.namelist():
-        if name.startswith("xl/worksheets/sheet") and name.endswith(".xml"):
-            s = read_zip_text(z, name)
-            for m2 in re.finditer(r"<cfRule\b[^>]*\bdxfId=\"(\d+)\"", s):
-                did = int(m2.group(1))
-                if did < 0 or did >= dxf_count:
-                    issues.append({"part": name, "issue": "cf_dxfId_out_of_range", "dxfId": did, "dxf_count": dxf_count})
-    return issues
-
-def scan_workbook_activeTab_mapping(z: zipfile.ZipFile):
+    for name in cache.sheet_parts:
+        sn, ss = _scan_sheet_cfrule_dxfid(name, cache.raw(name), dxf_count, sample_cap)
+        n += sn
+        issues.extend(ss[:sample_cap - len(issues)])
+    return n, issues
+
+def _scan_sheet_all(name: str, raw: bytes, dxf_count, stopship_limit: int, sample_cap: int):
+    oob, bbox = _scan_sheet_shared(name, raw, sample_cap)
+    stop = _scan_sheet_stopship(name, raw, stopship_limit)
+    cf = _scan_sheet_cf(name, raw)
+    dxf = (_scan_sheet_cfrule_dxfid(name, raw, dxf_count, sample_cap)
+           if dxf_count is not None else (0, []))
+    return oob, bbox, stop, cf, dxf
+
+def scan_sheets(cache: ZipCache, dxf_count, stopship_limit: int = 100, sample_cap: int = 25):
+    """
+    Fused pass over the worksheet parts: the shared-ref, stopship, cf-ref
+    and cfRule-dxfId detectors all run against the same buffer while it is
+    hot, one worker per sheet, instead of four scanner entry points each
+    revisiting every sheet.
+
+    Returns a (count, samples) pair per detector:
+    (oob, bbox, stopship_hits, cf_ref_hits, dxfid_issues). Counts are
+    exact (stopship stays capped at stopship_limit, as before); samples
+    stop accumulating at sample_cap since the report shows no more.
+    """
+    oob_n = bbox_n = cf_n = dxf_n = 0
+    oob, bbox, stopship, cf_hits, dxf_issues = [], [], [], [], []
+    blobs = [(n, cache.raw(n)) for n in cache.sheet_parts]
+    if len(blobs) <= 1:
+        results = [_scan_sheet_all(n, raw, dxf_count, stopship_limit, sample_cap)
+                   for n, raw in blobs]
+    else:
+        with ThreadPoolExecutor(max_workers=_pool_size(len(blobs))) as ex:
+            results = list(ex.map(
+                lambda pr: _scan_sheet_all(*pr, dxf_count, stopship_limit, sample_cap),
+                blobs))
+    for (on, os_), (bn, bs), s, cf, (dn, ds) in results:
+        oob_n += on
+        bbox_n += bn
+        dxf_n += dn
+        oob.extend(os_[:sample_cap - len(oob)])
+        bbox.extend(bs[:sample_cap - len(bbox)])
+        dxf_issues.extend(ds[:sample_cap - len(dxf_issues)])
+        if len(stopship) < stopship_limit:
+            stopship.extend(s[:stopship_limit - len(stopship)])
+        if cf is not None:
+            cf_n += 1
+            if len(cf_hits) < sample_cap:
+                cf_hits.append(cf)
+    return ((oob_n, oob), (bbox_n, bbox),
+            (len(stopship), stopship[:sample_cap]),
+            (cf_n, cf_hits), (dxf_n, dxf_issues))
+
+def scan_workbook_activeTab_mapping(cache: ZipCache):
     """
     Report activeTab and map it to sheet name + sheet part.
     Not an error gate, but logged for triage discipline.
     """
     out = {}
-    if "xl/workbook.xml" not in z.namelist() or "xl/_rels/workbook.xml.rels" not in z.namelist():
+    if "xl/workbook.xml" not in cache.name_set or "xl/_rels/workbook.xml.rels" not in cache.name_set:
         return out
 
-    wb = read_zip_text(z, "xl/workbook.xml")
-    rels = read_zip_text(z, "xl/_rels/workbook.xml.rels")
+    wb = cache.raw("xl/workbook.xml")
+    rels = cache.raw("xl/_rels/workbook.xml.rels")
 
     # activeTab
-    m = re.search(r"<workbookView\b[^>]*\bactiveTab=\"(\d+)\"", wb)
+    m = _RE_ACTIVETAB.search(wb)
     if not m:
         return out
     active = int(m.group(1))
@@ -375,22 +780,46 @@ def scan_workbook_activeTab_mapping(z: zipfile.ZipFile):
 
     # sheet order: list of (name, r:id)
     sheets = []
-    for sm in re.finditer(r"<sheet\b[^>]*\bname=\"([^\"]+)\"[^>]*\br:id=\"([^\"]+)\"[^>]*/>", wb):
+    for sm in _RE_SHEET_DECL.finditer(wb):
         sheets.append((sm.group(1), sm.group(2)))
 
     if 0 <= active < len(sheets):
         sheet_name, rid = sheets[active]
-        out["activeSheetName"] = sheet_name
-        out["activeSheetRid"] = rid
-        # rid -> target
-        rid_m = re.search(rf'Id="{re.escape(rid)}"\s+Type="[^"]+"\s+Target="([^"]+)"', rels)
-        if rid_m:
-            out["activeSheetTarget"] = "xl/" + rid_m.group(1)
+        out["activeSheetName"] = sheet_name.decode("utf-8", "ignore")
+        out["activeSheetRid"] = rid.decode("ascii", "ignore")
+        # rid -> target via a dict built in one pass over the rels part:
+        # no re.escape'd pattern per lookup, and attribute order no longer
+        # matters.
+        rid_to_target = {}
+        for rm in _RE_RELATIONSHIP_TAG.finditer(rels):
+            tag = rm.group(0)
+            idm = _RE_REL_ID.search(tag)
+            tm = _RE_TARGET.search(tag) or _RE_TARGET_SQ.search(tag)
+            if idm and tm:
+                rid_to_target[idm.group(1)] = tm.group(1)
+        target = rid_to_target.get(rid)
+        if target is not None:
+            out["activeSheetTarget"] = "xl/" + target.decode("utf-8", "ignore")
     out["sheetCount"] = len(sheets)
     return out
 
 # ---------- main ----------
 
+# The ten pass/fail gate counts: drives both the failing decision and
+# main()'s summary printout.
+_GATE_KEYS = (
+    "shared_ref_oob_count",
+    "shared_ref_bbox_mismatch_count",
+    "calcchain_invalid_count",
+    "stopship_token_hits_count",
+    "cf_ref_hits_count",
+    "tablecolumn_lf_hits_count",
+    "xml_wellformed_errors_count",
+    "illegal_control_chars_count",
+    "rels_missing_targets_count",
+    "styles_dxf_integrity_issues_count",
+)
+
 def validate(path: str):
     report = {
         "file": path,
@@ -402,78 +831,107 @@ def validate(path: str):
         ],
     }
 
-    with zipfile.ZipFile(path, "r") as z:
-        oob, bbox = scan_shared_ref_oob_and_bbox_mismatch_cellbounded(z)
-        calc_invalid = scan_calcchain_invalid_cellbounded(z)
-        stopship = scan_stopship_tokens(z)
-        cf_ref = scan_cf_ref_hits(z)
-        tbl_lf = scan_tablecolumn_lf(z)
-
-        xml_bad = scan_xml_wellformed(z)
-        ctrl_bad = scan_illegal_control_chars(z)
-        rels_missing = scan_rels_missing_targets(z)
-        styles_issues = scan_styles_dxf_integrity(z)
-        active_map = scan_workbook_activeTab_mapping(z)
-
-    report["gates"]["shared_ref_oob_count"] = len(oob)
-    report["gates"]["shared_ref_bbox_mismatch_count"] = len(bbox)
-    report["gates"]["calcchain_invalid_count"] = len(calc_invalid)
-    report["gates"]["stopship_token_hits_count"] = len(stopship)
-    report["gates"]["cf_ref_hits_count"] = len(cf_ref)
-    report["gates"]["tablecolumn_lf_hits_count"] = len(tbl_lf)
-
-    report["gates"]["xml_wellformed_errors_count"] = len(xml_bad)
-    report["gates"]["illegal_control_chars_count"] = len(ctrl_bad)
-    report["gates"]["rels_missing_targets_count"] = len(rels_missing)
-    report["gates"]["styles_dxf_integrity_issues_count"] = len(styles_issues)
-
-    # Keep samples small
+    # mmap the archive and hand zipfile one in-memory buffer: the member
+    # seeks become pointer arithmetic instead of buffered read() syscalls.
+    # (mmap objects predate seekable() on this interpreter, so the buffer
+    # goes through BytesIO -- a single bulk copy from the page cache.)
+    with open(path, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        with zipfile.ZipFile(io.BytesIO(mm), "r") as z:
+            cache = ZipCache(z)
+            # Styles state first, then one fused pass services every
+            # per-sheet detector; non-sheet parts keep their own scanners.
+            styles_issues, dxf_count = _styles_dxf_state(cache)
+            ((oob_n, oob), (bbox_n, bbox), (stop_n, stopship),
+             (cf_n, cf_ref), (dxf_n, dxfid_issues)) = scan_sheets(cache, dxf_count)
+            styles_n = len(styles_issues) + dxf_n
+            styles_issues = (styles_issues + dxfid_issues)[:25]
+            calc_n, calc_invalid = scan_calcchain_invalid_cellbounded(cache)
+            tbl_n, tbl_lf = scan_tablecolumn_lf(cache)
+
+            xml_n, xml_bad = scan_xml_wellformed(cache)
+            ctrl_n, ctrl_bad = scan_illegal_control_chars(cache)
+            rels_n, rels_missing = scan_rels_missing_targets(cache)
+            active_map = scan_workbook_activeTab_mapping(cache)
+
+    report["gates"]["shared_ref_oob_count"] = oob_n
+    report["gates"]["shared_ref_bbox_mismatch_count"] = bbox_n
+    report["gates"]["calcchain_invalid_count"] = calc_n
+    report["gates"]["stopship_token_hits_count"] = stop_n
+    report["gates"]["cf_ref_hits_count"] = cf_n
+    report["gates"]["tablecolumn_lf_hits_count"] = tbl_n
+
+    report["gates"]["xml_wellformed_errors_count"] = xml_n
+    report["gates"]["illegal_control_chars_count"] = ctrl_n
+    report["gates"]["rels_missing_targets_count"] = rels_n
+    report["gates"]["styles_dxf_integrity_issues_count"] = styles_n
+
+    # Samples were already capped at collection time; the scanners never
+    # materialize more finding dicts than shown here.
     report["samples"] = {
-        "shared_ref_oob": oob[:25],
-        "shared_ref_bbox_mismatch": bbox[:25],
-        "calcchain_invalid": calc_invalid[:25],
-        "stopship_hits": stopship[:25],
-        "cf_ref_hits": cf_ref[:25],
-        "tablecolumn_lf_hits": tbl_lf[:25],
-        "xml_wellformed_errors": xml_bad[:10],
-        "illegal_control_chars": ctrl_bad[:10],
-        "rels_missing_targets": rels_missing[:20],
-        "styles_dxf_integrity": styles_issues[:25],
+        "shared_ref_oob": oob,
+        "shared_ref_bbox_mismatch": bbox,
+        "calcchain_invalid": calc_invalid,
+        "stopship_hits": stopship,
+        "cf_ref_hits": cf_ref,
+        "tablecolumn_lf_hits": tbl_lf,
+        "xml_wellformed_errors": xml_bad,
+        "illegal_control_chars": ctrl_bad,
+        "rels_missing_targets": rels_missing,
+        "styles_dxf_integrity": styles_issues,
     }
 
     report["triage"]["workbookView"] = active_map
 
     # Decide pass/fail on any non-zero gate except triage mapping.
-    failing = any(v for k, v in report["gates"].items() if isinstance(v, int) and v != 0)
+    failing = any(report["gates"][k] for k in _GATE_KEYS)
     return report, failing
 
+def _write_report(report, out_path: str):
+    if orjson is not None:
+        with open(out_path, "wb") as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    else:
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+def _validate_one(path: str):
+    """Pool worker: validate, write the report, return the verdict."""
+    report, failing = validate(path)
+    out_path = path + ".webexcel_report.json"
+    _write_report(report, out_path)
+    return path, failing, out_path
+
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python webexcel_validate_strict.py YOUR_FILE.xlsx")
+    if len(sys.argv) < 2:
+        print("Usage: python webexcel_validate_strict.py YOUR_FILE.xlsx [MORE.xlsx ...]")
         sys.exit(2)
 
+    if len(sys.argv) > 2:
+        # Batch mode: one interpreter, one worker per core, so the
+        # zipfile/re/xml import cost is paid once per child instead of
+        # once per file. Order of completion does not matter; the exit
+        # code is the OR of the per-file verdicts.
+        paths = sys.argv[1:]
+        any_failing = False
+        with multiprocessing.Pool(os.cpu_count(), maxtasksperchild=64) as pool:
+            for path, failing, out_path in pool.imap_unordered(_validate_one, paths):
+                any_failing = any_failing or failing
+                print(f"{path}: {'FAIL' if failing else 'PASS'} ({out_path})")
+        sys.exit(2 if any_failing else 0)
+
     path = sys.argv[1]
     report, failing = validate(path)
 
     # Write JSON report
     out_path = path + ".webexcel_report.json"
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(report, f, indent=2)
+    _write_report(report, out_path)
 
     # Print summary
     print("FILE:", report["file"])
-    for k in (
-        "shared_ref_oob_count",
-        "shared_ref_bbox_mismatch_count",
-        "calcchain_invalid_count",
-        "stopship_token_hits_count",
-        "cf_ref_hits_count",
-        "tablecolumn_lf_hits_count",
-        "xml_wellformed_errors_count",
-        "illegal_control_chars_count",
-        "rels_missing_targets_count",
-        "styles_dxf_integrity_issues_count",
-    ):
+    for k in _GATE_KEYS:
         print(f"{k}: {report['gates'][k]}")
 
     wbv = report["triage"].get("workbookView", {})
@@ -5,13 +5,21 @@ Run:  python -m streamlit run app.py
 from __future__ import annotations
 import dataclasses
 import datetime
+import functools
+import hashlib
 import json
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import streamlit as st
 
+try:  # optional accelerator: C-level JSON encoding for the big display blobs
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 # ── page config (MUST be first Streamlit call) ──────────────────────────────
 st.set_page_config(
     page_title="Web-Excel Repair Triage",
@@ -20,8 +28,9 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-from triage.gate_checks import run_all, GateReport
-from triage.diff import diff_packages, DiffReport
+from triage.gate_checks import run_all, run_all_from_parts, GateReport
+from triage.diff import diff_packages_from_parts, DiffReport
+from triage.pkg_cache import load_parts
 from triage.patterns import detect_all, Pattern
 from triage.report import recipe_from_gates, recipe_from_patterns, merge_recipes, PatchRecipe
 from triage.patcher import apply_recipe, PatchError, PatchWarning
@@ -32,13 +41,15 @@ from triage.insight_ingest import ingest_xml_insights
 from triage.repo_apply import apply_recommendations
 from triage.storage_policy import budget_status, default_outputs_budget_bytes
 from triage.tutorial import get_tutorial_sections
+from triage.graph_probe import probe_by_item, probe_by_share_url, probe_upload_and_test
+from triage.desktop_iterate import iterate_until_desktop_clean
 
 # ── output folder ─────────────────────────────────────────────────────────────
 OUTPUTS_DIR = Path("Outputs")
 OUTPUTS_DIR.mkdir(exist_ok=True)
 
 # ── CSS theme ────────────────────────────────────────────────────────────────
-st.markdown("""
+_CSS = """
 <style>
   [data-testid="stSidebar"] { background:#0d1117; }
   .main-header {
@@ -60,15 +71,36 @@ st.markdown("""
   .tutorial-box { background:#0a1a0a; border:1px solid #1a4a2a;
                   border-radius:6px; padding:12px 16px; margin:8px 0; }
 </style>
-""", unsafe_allow_html=True)
+"""
 
 # ── header ───────────────────────────────────────────────────────────────────
-st.markdown("""
+_HEADER = """
 <div class="main-header">
   <h1>🔬 Web-Excel Repair Triage</h1>
   <p>Gate checks · Part diff · Pattern detection · Patch engine · Graph probe</p>
 </div>
-""", unsafe_allow_html=True)
+"""
+
+# Both blocks must be re-emitted every rerun: Streamlit rebuilds the element
+# tree per run, so a session_state-gated injection would drop the theme on
+# the first interaction. Hoisting the strings at least keeps them as interned
+# module constants instead of fresh per-rerun literals inside call syntax.
+st.markdown(_CSS, unsafe_allow_html=True)
+st.markdown(_HEADER, unsafe_allow_html=True)
+
+
+def _dumps_indent2(obj) -> str:
+    """Indented JSON for display; orjson is ~5-10x stdlib on indented output."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, indent=2)
+
+
+def _loads(data):
+    """JSON decode via orjson when available (~2x stdlib)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 def _rerun_safe() -> None:
@@ -115,6 +147,7 @@ def _render_tutorial() -> None:
 _render_tutorial()
 
 # ── helpers ──────────────────────────────────────────────────────────────────
+@functools.lru_cache(maxsize=512)
 def _fmt_bytes(n: int) -> str:
     if n < 1024: return f"{n} B"
     if n < 1_048_576: return f"{n/1024:.1f} KB"
@@ -264,7 +297,7 @@ def _render_batch_runner() -> None:
                 results.append({"file": str(p), "gate": gd})
                 if write_outputs:
                     (out_dir / (p.stem + "_gates.json")).write_text(
-                        json.dumps(gd, indent=2), encoding="utf-8"
+                        _dumps_indent2(gd), encoding="utf-8"
                     )
             except Exception as e:  # pragma: no cover (UI only)
                 results.append({"file": str(p), "error": repr(e)})
@@ -287,7 +320,7 @@ def _render_batch_runner() -> None:
                     for r in results
                 ],
             }
-            (out_dir / "run_report.json").write_text(json.dumps(run_report, indent=2), encoding="utf-8")
+            (out_dir / "run_report.json").write_text(_dumps_indent2(run_report), encoding="utf-8")
 
         batch_state.update(
             {
@@ -401,8 +434,6 @@ def _render_batch_runner() -> None:
             "ENDEAVOR: Bulk local iteration — run desktop Excel iterate loop across Deprecated files, "
             "update working variants, and persist artifacts under Outputs/workflow_runs/."
         )
-        from triage.desktop_iterate import iterate_until_desktop_clean
-
         tsb = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         batch_dir = OUTPUTS_DIR / "workflow_runs" / f"batch_local_{tsb}"
         batch_dir.mkdir(parents=True, exist_ok=True)
@@ -442,7 +473,7 @@ def _render_batch_runner() -> None:
                         timeout_seconds=int(desktop_timeout),
                     )
                     (file_dir / "desktop_iterate.json").write_text(
-                        json.dumps(dataclasses.asdict(it), indent=2), encoding="utf-8"
+                        _dumps_indent2(dataclasses.asdict(it)), encoding="utf-8"
                     )
 
                     wf_latest[origin_key] = str(it.final_path)
@@ -450,7 +481,7 @@ def _render_batch_runner() -> None:
                     post_gate = run_all(str(final_path)).to_dict()
                     wf_gates[str(final_path)] = post_gate
                     (file_dir / "post_gates.json").write_text(
-                        json.dumps(post_gate, indent=2), encoding="utf-8"
+                        _dumps_indent2(post_gate), encoding="utf-8"
                     )
 
                     bulk_rows.append(
@@ -482,7 +513,7 @@ def _render_batch_runner() -> None:
                 "results": bulk_rows,
             }
             report_path = batch_dir / "bulk_local_report.json"
-            report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+            report_path.write_text(_dumps_indent2(report), encoding="utf-8")
             st.success(f"Bulk local iteration complete. Report: {report_path}")
 
     if col_b.button("🌐 Iterate in web (Graph) — bulk", key="bulk_graph_iter_btn"):
@@ -496,8 +527,6 @@ def _render_batch_runner() -> None:
                 "ENDEAVOR: Bulk web iteration (Graph) — refused. Provide a Bearer token in the sidebar Graph Probe section."
             )
         else:
-            from triage.graph_probe import probe_upload_and_test
-
             tsb = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             batch_dir = OUTPUTS_DIR / "workflow_runs" / f"batch_web_{tsb}"
             batch_dir.mkdir(parents=True, exist_ok=True)
@@ -541,7 +570,7 @@ def _render_batch_runner() -> None:
                             )
                             g_dict = dataclasses.asdict(g)
                             (file_dir / f"graph_probe_iter{itn}.json").write_text(
-                                json.dumps(g_dict, indent=2), encoding="utf-8"
+                                _dumps_indent2(g_dict), encoding="utf-8"
                             )
                             steps.append({"iter": itn, "probe": g_dict, "path": str(cur)})
 
@@ -553,7 +582,7 @@ def _render_batch_runner() -> None:
                             gate_obj = run_all(str(cur))
                             recipe = recipe_from_gates(gate_obj)
                             (file_dir / f"gate_recipe_iter{itn}.json").write_text(
-                                json.dumps(recipe.to_dict(), indent=2), encoding="utf-8"
+                                _dumps_indent2(recipe.to_dict()), encoding="utf-8"
                             )
                             if not recipe.patches:
                                 steps.append({"iter": itn, "note": "No gate patches generated; stopping."})
@@ -571,7 +600,7 @@ def _render_batch_runner() -> None:
                             post_gate = run_all(str(cur)).to_dict()
                             wf_gates[str(cur)] = post_gate
                             (file_dir / f"post_gates_after_patch_iter{itn}.json").write_text(
-                                json.dumps(post_gate, indent=2), encoding="utf-8"
+                                _dumps_indent2(post_gate), encoding="utf-8"
                             )
                             if warn_exc:
                                 steps.append(
@@ -586,7 +615,7 @@ def _render_batch_runner() -> None:
                         final_gate = run_all(str(cur)).to_dict()
                         wf_gates[str(cur)] = final_gate
                         (file_dir / "final_gates.json").write_text(
-                            json.dumps(final_gate, indent=2), encoding="utf-8"
+                            _dumps_indent2(final_gate), encoding="utf-8"
                         )
 
                         bulk_rows.append(
@@ -617,7 +646,7 @@ def _render_batch_runner() -> None:
                     "results": bulk_rows,
                 }
                 report_path = batch_dir / "bulk_web_report.json"
-                report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+                report_path.write_text(_dumps_indent2(report), encoding="utf-8")
                 st.success(f"Bulk web iteration complete. Report: {report_path}")
 
     if col_c.button("⬆️ Promote all PASS variants — bulk", key="bulk_promote_btn"):
@@ -720,7 +749,7 @@ def _render_batch_runner() -> None:
                     "results": bulk_rows,
                 }
                 report_path = batch_dir / "bulk_promote_report.json"
-                report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+                report_path.write_text(_dumps_indent2(report), encoding="utf-8")
                 st.success(f"Bulk promote complete. Report: {report_path}")
 
     st.markdown("---")
@@ -789,8 +818,8 @@ def _render_batch_runner() -> None:
                             gate_obj = run_all(str(current_path))
                             pre_dict = gate_obj.to_dict()
                             recipe = recipe_from_gates(gate_obj)
-                            (out_dir2 / "pre_gates.json").write_text(json.dumps(pre_dict, indent=2), encoding="utf-8")
-                            (out_dir2 / "recipe.json").write_text(json.dumps(recipe.to_dict(), indent=2), encoding="utf-8")
+                            (out_dir2 / "pre_gates.json").write_text(_dumps_indent2(pre_dict), encoding="utf-8")
+                            (out_dir2 / "recipe.json").write_text(_dumps_indent2(recipe.to_dict()), encoding="utf-8")
 
                             if not recipe.patches:
                                 st.info("No deterministic patches generated (already clean or requires manual work).")
@@ -804,7 +833,7 @@ def _render_batch_runner() -> None:
                                     patched_path = Path(pw.output_path)
 
                                 post_dict = run_all(str(patched_path)).to_dict()
-                                (out_dir2 / "post_gates.json").write_text(json.dumps(post_dict, indent=2), encoding="utf-8")
+                                (out_dir2 / "post_gates.json").write_text(_dumps_indent2(post_dict), encoding="utf-8")
 
                                 wf_latest[origin_key] = str(patched_path)
                                 wf_gates[str(patched_path)] = post_dict
@@ -831,8 +860,6 @@ def _render_batch_runner() -> None:
                     )
                     with st.spinner("Running desktop iterate loop (this will launch Excel)…"):
                         try:
-                            from triage.desktop_iterate import iterate_until_desktop_clean
-
                             ts2 = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
                             out_dir2 = OUTPUTS_DIR / "workflow_runs" / f"{file_path.stem}_{ts2}"
                             out_root = out_dir2 / "desktop_iter"
@@ -845,7 +872,7 @@ def _render_batch_runner() -> None:
                                 timeout_seconds=int(desktop_timeout),
                             )
                             (out_dir2 / "desktop_iterate.json").write_text(
-                                json.dumps(dataclasses.asdict(it), indent=2), encoding="utf-8"
+                                _dumps_indent2(dataclasses.asdict(it)), encoding="utf-8"
                             )
 
                             wf_latest[origin_key] = str(it.final_path)
@@ -854,7 +881,7 @@ def _render_batch_runner() -> None:
                             post_dict = run_all(str(current_path)).to_dict()
                             wf_gates[str(current_path)] = post_dict
                             current_gate = post_dict
-                            (out_dir2 / "post_gates.json").write_text(json.dumps(post_dict, indent=2), encoding="utf-8")
+                            (out_dir2 / "post_gates.json").write_text(_dumps_indent2(post_dict), encoding="utf-8")
 
                             st.success(
                                 f"Desktop iterate finished: {'CLEAN' if it.success_clean else 'NOT CLEAN'} — {current_path.name}"
@@ -927,8 +954,12 @@ with st.sidebar:
 
     st.markdown("---")
     st.markdown("### 🔑 Graph Probe *(optional)*")
+    # Snapshot the env default once; passing value= on every rerun forces a
+    # widget-state diff against the environment lookup each time.
+    if "graph_token" not in st.session_state:
+        st.session_state["graph_token"] = os.environ.get("GRAPH_TOKEN", "")
     graph_token = st.text_input("Bearer Token (GRAPH_TOKEN)", type="password",
-                                value=os.environ.get("GRAPH_TOKEN", ""))
+                                key="graph_token")
     probe_mode = st.selectbox("Probe mode", ["Upload & test", "By drive+item", "By share URL"])
     g_drive = g_item = g_share = ""
     if probe_mode == "By drive+item":
@@ -943,10 +974,9 @@ with st.sidebar:
     _billing_runs_root = Path("billing_runs")
     _recent_runs = sorted(_billing_runs_root.glob("*/run_manifest.json")) if _billing_runs_root.exists() else []
     if _recent_runs:
-        import json as _json
         for _mf in reversed(_recent_runs[-3:]):
             try:
-                _m = _json.loads(_mf.read_text(encoding="utf-8"))
+                _m = _loads(_mf.read_text(encoding="utf-8"))
                 _status_icon = "✅" if _m.get("status") == "pass" else ("⚠️" if _m.get("status") == "generated" else "❌")
                 st.caption(
                     f"{_status_icon} `{_mf.parent.name}` — {_m.get('status','?')} "
@@ -969,27 +999,94 @@ with st.sidebar:
 
     st.markdown("---")
     st.markdown("### 📁 Folder Shortcuts")
+
+    # Cached listing + one batched markdown per folder: a per-file
+    # st.markdown is a separate delta frame over the WebSocket, and the
+    # per-file stat() syscalls repeat on every rerun. TTL keeps filesystem
+    # changes surfacing within 30 s.
+    @st.cache_data(ttl=30, show_spinner=False)
+    def _scan_folder(folder: str) -> tuple[int, str]:
+        # One scandir pass instead of two globs plus a stat per file:
+        # DirEntry.stat() reuses the data the directory walk already fetched.
+        # Rows are rendered to HTML here too, so cache hits hand the render
+        # loop a ready-made string instead of re-formatting per rerun.
+        try:
+            with os.scandir(folder) as it:
+                entries = sorted(
+                    (e.name, e.stat().st_size)
+                    for e in it
+                    if e.name.endswith((".xlsx", ".json")) and e.is_file()
+                )
+        except FileNotFoundError:
+            return 0, ""
+        rows = "\n".join(
+            f'<div class="folder-file">📄 {name}<br>'
+            f'<span style="color:#666">{_fmt_bytes(size)}</span></div>'
+            for name, size in entries
+        )
+        return len(entries), rows
+
     for folder in ("Candidates", "Active", "Repaired", "Deprecated", "Outputs"):
-        p = Path(folder)
-        if not p.exists():
-            continue
-        files = sorted(p.glob("*.xlsx")) + sorted(p.glob("*.json"))
-        if not files:
+        n_files, rows = _scan_folder(folder)
+        if not n_files:
             continue
-        with st.expander(f"{folder}/ ({len(files)} file{'s' if len(files)!=1 else ''})"):
-            for f in files:
-                size_str = _fmt_bytes(f.stat().st_size)
-                st.markdown(f'<div class="folder-file">📄 {f.name}<br>'
-                            f'<span style="color:#666">{size_str}</span></div>',
-                            unsafe_allow_html=True)
-
-# ── helper: save upload to temp file ─────────────────────────────────────────
-@st.cache_data(show_spinner=False)
-def _save_temp(name: str, data: bytes) -> str:
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx", prefix=name[:20] + "_")
-    tmp.write(data)
-    tmp.flush()
-    return tmp.name
+        with st.expander(f"{folder}/ ({n_files} file{'s' if n_files != 1 else ''})"):
+            st.markdown(rows, unsafe_allow_html=True)
+
+# ── helper: stream uploads to content-addressed staging files ────────────────
+def _stage_upload(uploaded) -> tuple[str, str]:
+    """
+    Stage an upload under Outputs/.cache/<sha256>.xlsx and return
+    (path, digest).
+
+    The file is streamed to disk in 1 MiB chunks with a rolling hash, so the
+    workbook is never materialized as one bytes object on our side — peak
+    extra memory is one chunk regardless of upload size. The (path, digest)
+    pair is memoized in session_state keyed by (name, size, file_id); stale
+    entries for a replaced file in the same slot are dropped. Content-addressing
+    means re-uploading identical bytes reuses the existing staged file; the
+    newest 16 staged files are kept and older ones swept on each new write.
+    """
+    key = f"_staged::{uploaded.name}::{uploaded.size}::{uploaded.file_id}"
+    if key not in st.session_state:
+        prefix = f"_staged::{uploaded.name}::"
+        for stale in [k for k in st.session_state.keys()
+                      if isinstance(k, str) and k.startswith(prefix) and k != key]:
+            del st.session_state[stale]
+
+        cache_dir = OUTPUTS_DIR / ".cache"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        h = hashlib.sha256()
+        uploaded.seek(0)
+        tmp = tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".part", delete=False)
+        try:
+            with tmp:
+                while chunk := uploaded.read(1 << 20):
+                    h.update(chunk)
+                    tmp.write(chunk)
+            digest = h.hexdigest()
+            staged = cache_dir / f"{digest}.xlsx"
+            if staged.exists():
+                os.unlink(tmp.name)
+            else:
+                os.replace(tmp.name, staged)
+                by_age = sorted(cache_dir.glob("*.xlsx"),
+                                key=lambda f: f.stat().st_mtime, reverse=True)
+                for old in by_age[16:]:
+                    try:
+                        old.unlink()
+                    except OSError:
+                        pass
+        except BaseException:
+            try:
+                os.unlink(tmp.name)
+            except OSError:
+                pass
+            raise
+        finally:
+            uploaded.seek(0)
+        st.session_state[key] = (str(staged), digest)
+    return st.session_state[key]
 
 
 def _render_repo_engine() -> None:
@@ -1841,84 +1938,33 @@ if not cand_file:
                 st.info("Upload a **Candidate .xlsx** in the sidebar to begin.")
     st.stop()
 
-# Save uploads (cache by file content so re-uploads don't re-read)
-cand_bytes = cand_file.read()
-cand_path  = _save_temp(cand_file.name, cand_bytes)
-rep_path   = _save_temp(rep_file.name, rep_file.read()) if rep_file else None
-
-# ── run gate checks (cached by file content) ─────────────────────────────────
-@st.cache_data(show_spinner="Running gate checks…")
-def _run_gates(path: str) -> dict:
-    return run_all(path).to_dict()
-
-gate_dict = _run_gates(cand_path)
-
-# ── run diff (if repaired file present) ──────────────────────────────────────
-@st.cache_data(show_spinner="Diffing packages…")
-def _run_diff(cpath: str, rpath: str) -> dict:
-    return diff_packages(cpath, rpath).to_dict()
-
-diff_dict = _run_diff(cand_path, rep_path) if rep_path else None
-
-# ═══════════════════════════════════════════════════════════════════════
-# TAB 1: OVERVIEW
-# ═══════════════════════════════════════════════════════════════════════
-with tabs[0]:
-    with st.expander("ℹ️  How this tab works", expanded=False):
-        st.markdown("""
-**Overview** gives you a one-glance verdict on your Candidate workbook.
-
-1. Upload a **Candidate .xlsx** in the sidebar (the file you want to test).
-2. All 11 structural gate checks run automatically — each one lights up green ✅ or red ❌.
-3. If you also upload a **Repaired .xlsx** (what Excel for Web saved after repairing your file),
-   the *Changed parts* metric shows how many ZIP entries differ.
-
-**What to do with failures:**
-- Go to the **Gate Checks** tab for detail and JSON samples of offending items.
-- Go to **Patch & Export** to download an auto-generated fix recipe.
-- Go to **Part Diff** (with a Repaired file) to see exactly what Excel changed.
-        """)
-
-    col1, col2, col3 = st.columns(3)
-    fg = gate_dict["failing_gates"]
-    n_fail = len(fg)
-    verdict = "✅ PASS" if not fg else f"❌ {n_fail} GATE(S) FAILING"
-    col1.metric("Gate verdict", verdict)
-    col2.metric("Failing gates", n_fail)
-    if diff_dict:
-        col3.metric("Changed parts", diff_dict["summary"]["changed"])
-    else:
-        col3.metric("Repaired file", "not provided")
-
-    st.markdown("#### Gate Scorecard")
-    ALL_GATES = [
-        ("stopship_tokens",       "Stop-ship tokens (_xlfn, _xludf, AGGREGATE)"),
-        ("cf_ref_hits",           "#REF! in conditional formatting"),
-        ("tablecolumn_lf",        "Linefeed in tableColumn name="),
-        ("calcchain_invalid",     "calcChain invalid entries"),
-        ("shared_ref_oob",        "Shared formula ref OOB (exceeds max row)"),
-        ("shared_ref_bbox",       "Shared formula bbox mismatch"),
-        ("styles_dxf_integrity",  "dxfs count / cfRule dxfId integrity"),
-        ("cf_policy_deploymenttracker", "CF policy: Deployment Tracker (severity colors + required rules)"),
-        ("xml_wellformed",        "XML well-formedness errors"),
-        ("illegal_control_chars", "Illegal control characters in XML"),
-        ("rels_missing_targets",  "Missing relationship targets"),
-    ]
-    for key, label in ALL_GATES:
-        count = fg.get(key, 0)
-        css = "gate-fail" if count else "gate-pass"
-        icon = "❌" if count else "✅"
-        st.markdown(f'<div class="{css}">{icon} <b>{label}</b> — {count} finding(s)</div>',
-                    unsafe_allow_html=True)
-
-    at = gate_dict.get("triage", {}).get("activetab", {})
-    if at:
-        st.markdown("#### 📑 Workbook View")
-        st.json(at)
+# Stage uploads (streamed to disk; memoized per session so reruns are free)
+cand_path, cand_digest = _stage_upload(cand_file)
+rep_path, rep_digest = _stage_upload(rep_file) if rep_file else (None, None)
+
+# ── single analysis pipeline (cached by file content) ────────────────────────
+# One cached pass per unique (candidate, repaired) byte pair: gates, diff,
+# patterns and the merged recipe all come out of the same workbook parse
+# instead of each tab re-running its own. Keyed on the staging digest
+# (SHA-256 of the upload, computed while streaming it to disk), not the temp
+# path, so re-uploading the same file hits the cache and a modified file
+# invalidates it.
+# Gate metadata, hoisted ahead of _analyze so the cached pipeline can
+# pre-materialize the per-gate display rows.
+ALL_GATES = [
+    ("stopship_tokens",       "Stop-ship tokens (_xlfn, _xludf, AGGREGATE)"),
+    ("cf_ref_hits",           "#REF! in conditional formatting"),
+    ("tablecolumn_lf",        "Linefeed in tableColumn name="),
+    ("calcchain_invalid",     "calcChain invalid entries"),
+    ("shared_ref_oob",        "Shared formula ref OOB (exceeds max row)"),
+    ("shared_ref_bbox",       "Shared formula bbox mismatch"),
+    ("styles_dxf_integrity",  "dxfs count / cfRule dxfId integrity"),
+    ("cf_policy_deploymenttracker", "CF policy: Deployment Tracker (severity colors + required rules)"),
+    ("xml_wellformed",        "XML well-formedness errors"),
+    ("illegal_control_chars", "Illegal control characters in XML"),
+    ("rels_missing_targets",  "Missing relationship targets"),
+]
 
-# ═══════════════════════════════════════════════════════════════════════
-# TAB 2: GATE CHECKS (detail)
-# ═══════════════════════════════════════════════════════════════════════
 _GATE_TO_SAMPLE = {
     "stopship_tokens":       "stopship",
     "cf_ref_hits":           "cf_ref",
@@ -1970,6 +2016,133 @@ _GATE_HELP = {
         "that does not exist in the ZIP.  Excel for Web cannot resolve the reference.",
 }
 
+# Pre-joined render table: one tuple per gate carrying everything the render
+# loops need, so per-rerun iteration is tuple unpacking with no dict lookups.
+_GATE_ROWS = tuple(
+    (key, label, _GATE_TO_SAMPLE.get(key, key), _GATE_HELP.get(key, ""))
+    for key, label in ALL_GATES
+)
+
+
+# cache_resource rather than cache_data: the result can carry sizeable diff
+# previews and sample lists, and cache_data would pickle it on store and
+# unpickle it on every rerun. The live dict is returned by reference and is
+# treated as read-only by every consumer below.
+@st.cache_resource(
+    show_spinner="Analyzing workbook…",
+    max_entries=16,
+    ttl="1h",
+)
+def _analyze(cand_digest: str, rep_digest: str | None,
+             _cand_path: str, _rep_path: str | None) -> dict:
+    # Keyed on the staging digests computed while streaming the uploads; the
+    # underscore-prefixed paths are excluded from the cache key since the
+    # digest already pins the content.
+    cpath = _cand_path
+    rpath = _rep_path
+
+    # Inflate each archive exactly once, then share the in-memory parts
+    # between the gate battery and the diff. The phases are mostly
+    # zipfile/regex work in C that releases the GIL — overlap them instead
+    # of paying T_gates + T_diff serially.
+    if rpath:
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            f_rep = ex.submit(load_parts, rpath)
+            c_pkg = load_parts(cpath)
+            r_pkg = f_rep.result()
+            f_gates = ex.submit(run_all_from_parts, c_pkg)
+            dr = diff_packages_from_parts(c_pkg, r_pkg)
+            gr = f_gates.result()
+    else:
+        gr = run_all(cpath)
+        dr = None
+
+    out: dict = {
+        "gates": gr.to_dict(),
+        "diff": None,
+        "patterns": [],
+    }
+    if dr is not None:
+        out["diff"] = dr.to_dict()
+        pats = detect_all(dr)
+        out["patterns"] = [{"name": p.name, "description": p.description,
+                            "parts": p.affected_parts, "confidence": p.confidence,
+                            "patch_hint": p.suggested_patch} for p in pats]
+        out["recipe"] = merge_recipes(
+            recipe_from_gates(gr), recipe_from_patterns(cpath, pats)
+        ).to_dict()
+    else:
+        out["recipe"] = recipe_from_gates(gr).to_dict()
+    out["needs_review_count"] = sum(
+        1 for pt in out["recipe"].get("patches", []) if pt.get("needs_review"))
+    # Pre-render the recipe JSON here so reruns display a cached string
+    # instead of re-encoding the whole recipe per widget click.
+    out["recipe_json"] = _dumps_indent2(out["recipe"])
+    # Per-gate display rows: (key, label, count, help, formatted sample
+    # JSON). Encoding the sample lists here means the Overview and Gate
+    # Checks tabs are pure render loops with no JSON work per rerun.
+    fg = out["gates"].get("failing_gates", {}) or {}
+    samples = out["gates"].get("samples", {}) or {}
+    out["gate_rows"] = [
+        (key, label, fg.get(key, 0), help_txt,
+         _dumps_indent2(hits) if (hits := samples.get(sample_key, [])) else "")
+        for key, label, sample_key, help_txt in _GATE_ROWS
+    ]
+    return out
+
+_analysis = _analyze(cand_digest, rep_digest, cand_path, rep_path)
+gate_dict = _analysis["gates"]
+diff_dict = _analysis["diff"]
+
+# ═══════════════════════════════════════════════════════════════════════
+# TAB 1: OVERVIEW
+# ═══════════════════════════════════════════════════════════════════════
+with tabs[0]:
+    with st.expander("ℹ️  How this tab works", expanded=False):
+        st.markdown("""
+**Overview** gives you a one-glance verdict on your Candidate workbook.
+
+1. Upload a **Candidate .xlsx** in the sidebar (the file you want to test).
+2. All 11 structural gate checks run automatically — each one lights up green ✅ or red ❌.
+3. If you also upload a **Repaired .xlsx** (what Excel for Web saved after repairing your file),
+   the *Changed parts* metric shows how many ZIP entries differ.
+
+**What to do with failures:**
+- Go to the **Gate Checks** tab for detail and JSON samples of offending items.
+- Go to **Patch & Export** to download an auto-generated fix recipe.
+- Go to **Part Diff** (with a Repaired file) to see exactly what Excel changed.
+        """)
+
+    col1, col2, col3 = st.columns(3)
+    fg = gate_dict["failing_gates"]
+    n_fail = len(fg)
+    verdict = "✅ PASS" if not fg else f"❌ {n_fail} GATE(S) FAILING"
+    col1.metric("Gate verdict", verdict)
+    col2.metric("Failing gates", n_fail)
+    if diff_dict:
+        col3.metric("Changed parts", diff_dict["summary"]["changed"])
+    else:
+        col3.metric("Repaired file", "not provided")
+
+    st.markdown("#### Gate Scorecard")
+    # One markdown element for the whole scorecard: each st.markdown call
+    # goes through the front-end markdown pipeline separately, so ten calls
+    # cost ten renders per rerun.
+    scorecard = "".join(
+        f'<div class="{"gate-fail" if count else "gate-pass"}">'
+        f'{"❌" if count else "✅"} <b>{label}</b> — {count} finding(s)</div>'
+        for _key, label, count, _help_txt, _sample_json in _analysis["gate_rows"]
+    )
+    st.markdown(scorecard, unsafe_allow_html=True)
+
+    at = gate_dict.get("triage", {}).get("activetab", {})
+    if at:
+        st.markdown("#### 📑 Workbook View")
+        st.json(at)
+
+# ═══════════════════════════════════════════════════════════════════════
+# TAB 2: GATE CHECKS (detail)
+# ═══════════════════════════════════════════════════════════════════════
 with tabs[1]:
     with st.expander("ℹ️  How this tab works", expanded=False):
         st.markdown("""
@@ -1982,16 +2155,12 @@ with tabs[1]:
 - Use the findings here to guide editing in the **Patch & Export** tab.
         """)
 
-    samples = gate_dict.get("samples", {})
-    for key, label in ALL_GATES:
-        count = gate_dict["failing_gates"].get(key, 0)
-        hits  = samples.get(_GATE_TO_SAMPLE.get(key, key), [])
+    for key, label, count, help_txt, sample_json in _analysis["gate_rows"]:
         with st.expander(f"{'❌' if count else '✅'} {label} ({count})", expanded=bool(count)):
-            help_txt = _GATE_HELP.get(key, "")
             if help_txt:
                 st.caption(help_txt)
-            if hits:
-                st.code(json.dumps(hits, indent=2), language="json")
+            if sample_json:
+                st.code(sample_json, language="json")
             else:
                 st.success("No findings.")
 
@@ -2025,15 +2194,24 @@ as a `.txt` file using the button below the code block.
 
         if diff_dict["added"]:
             with st.expander(f"➕ Added parts ({sm['added']})", expanded=True):
-                for n in diff_dict["added"]:
-                    st.code(n, language="text")
+                st.code("\n".join(diff_dict["added"]), language="text")
         if diff_dict["removed"]:
             with st.expander(f"➖ Removed parts ({sm['removed']})", expanded=True):
-                for n in diff_dict["removed"]:
-                    st.code(n, language="text")
+                st.code("\n".join(diff_dict["removed"]), language="text")
 
         st.markdown("#### Changed Parts — XML Diff")
-        all_diffs: list[str] = []
+        # Large diffs are written to disk once and only previewed inline:
+        # embedding a multi-MB string in st.code re-ships it over the
+        # WebSocket on every rerun. The combined file is keyed by the
+        # content-addressed input paths, so it is built once per file pair
+        # and streamed straight from disk on download.
+        _DIFF_PREVIEW_LIMIT = 64_000
+        diffs_dir = OUTPUTS_DIR / ".cache" / "diffs"
+        combo_key = hashlib.sha256((cand_path + "::" + str(rep_path)).encode("utf-8")).hexdigest()[:16]
+        combo_path = diffs_dir / f"all_{combo_key}.diff.txt"
+        combo_fh = None
+        build_combo = not combo_path.exists()
+        have_any_diff = False
         for entry in diff_dict["changed"]:
             delta    = entry.get("size_delta", 0) or 0
             sign     = "+" if delta >= 0 else ""
@@ -2044,23 +2222,41 @@ as a `.txt` file using the button below the code block.
                 cols[1].metric("Repaired size",  entry.get("repaired_size"))
                 xd = entry.get("xml_diff", "")
                 if xd:
-                    st.code(xd, language="diff")
+                    if len(xd) > _DIFF_PREVIEW_LIMIT:
+                        diffs_dir.mkdir(parents=True, exist_ok=True)
+                        d_key = hashlib.sha256(xd.encode("utf-8")).hexdigest()[:16]
+                        d_path = diffs_dir / f"{part_key}_{d_key}.diff.txt"
+                        if not d_path.exists():
+                            d_path.write_bytes(xd.encode("utf-8"))
+                        st.code(xd[:4000] + "\n… [truncated — download the full diff below]",
+                                language="diff")
+                        dl_data = d_path.open("rb")
+                    else:
+                        st.code(xd, language="diff")
+                        dl_data = xd.encode("utf-8")
                     st.download_button(
                         f"⬇️ Download diff — {entry['part']}",
-                        xd.encode("utf-8"),
+                        dl_data,
                         file_name=f"{part_key}.diff.txt",
                         mime="text/plain",
                         key=f"dl_diff_{part_key}",
                     )
-                    all_diffs.append(f"{'='*60}\n{entry['part']}\n{'='*60}\n{xd}\n")
+                    have_any_diff = True
+                    if build_combo:
+                        if combo_fh is None:
+                            diffs_dir.mkdir(parents=True, exist_ok=True)
+                            combo_fh = open(combo_path, "w", encoding="utf-8")
+                        combo_fh.write(f"{'='*60}\n{entry['part']}\n{'='*60}\n{xd}\n\n")
                 else:
                     st.caption("(binary part — no text diff)")
+        if combo_fh is not None:
+            combo_fh.close()
 
-        if all_diffs:
+        if have_any_diff and combo_path.exists():
             st.markdown("---")
             st.download_button(
                 "⬇️ Download ALL diffs as one .txt file",
-                "\n".join(all_diffs).encode("utf-8"),
+                combo_path.open("rb"),
                 file_name=f"{Path(cand_file.name).stem}_all_diffs.txt",
                 mime="text/plain",
                 key="dl_all_diffs",
@@ -2088,17 +2284,7 @@ into the **Patch & Export** tab.  Copy the hint text, go to Tab 5, and use it to
 refine the `patch_recipe.json`.
             """)
 
-        @st.cache_data(show_spinner="Detecting patterns…")
-        def _detect_patterns(cp: str, rp: str):
-            from triage.diff import diff_packages
-            from triage.patterns import detect_all
-            dr   = diff_packages(cp, rp)
-            pats = detect_all(dr)
-            return [{"name": p.name, "description": p.description,
-                     "parts": p.affected_parts, "confidence": p.confidence,
-                     "patch_hint": p.suggested_patch} for p in pats]
-
-        patterns = _detect_patterns(cand_path, rep_path)
+        patterns = _analysis["patterns"]
         if not patterns:
             st.success("No known repair patterns detected in this diff.")
         else:
@@ -2150,34 +2336,18 @@ any machine — all without needing the original workbook open.
 
     st.markdown("### 🩹 Auto-generated Patch Recipe")
 
-    @st.cache_data(show_spinner="Building patch recipe…")
-    def _gate_recipe_dict(cp: str) -> dict:
-        return recipe_from_gates(run_all(cp)).to_dict()
-
-    @st.cache_data(show_spinner="Building full recipe…")
-    def _full_recipe(cp: str, rp: str) -> dict:
-        from triage.diff import diff_packages
-        from triage.patterns import detect_all
-        dr   = diff_packages(cp, rp)
-        pats = detect_all(dr)
-        gr   = run_all(cp)
-        r1   = recipe_from_gates(gr)
-        r2   = recipe_from_patterns(cp, pats)
-        return merge_recipes(r1, r2).to_dict()
-
-    recipe_dict = _full_recipe(cand_path, rep_path) if (diff_dict and rep_path) \
-                  else _gate_recipe_dict(cand_path)
-    recipe_json = json.dumps(recipe_dict, indent=2)
+    recipe_dict = _analysis["recipe"]
+    recipe_json = _analysis["recipe_json"]
 
     n_patches = len(recipe_dict.get("patches", []))
-    needs_review = sum(1 for p in recipe_dict.get("patches", [])
-                       if "<FILL_IN" in json.dumps(p) or "<REVIEW" in json.dumps(p))
+    needs_review = _analysis["needs_review_count"]
     rc1, rc2, rc3 = st.columns(3)
     rc1.metric("Patch operations", n_patches)
     rc2.metric("Need manual review", needs_review)
     rc3.metric("Ready to apply", n_patches - needs_review)
 
-    st.code(recipe_json, language="json")   # ← built-in copy button
+    with st.expander("Recipe JSON", expanded=False):
+        st.code(recipe_json, language="json")   # ← built-in copy button
 
     stem = Path(cand_file.name).stem
     ts   = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -2196,55 +2366,99 @@ any machine — all without needing the original workbook open.
         st.success(f"Saved → {out_recipe}")
 
     st.markdown("---")
-    st.markdown("### ▶️ Apply Recipe & Export Patched .xlsx")
-    uploaded_recipe = st.file_uploader(
-        "Override recipe JSON (optional — upload your edited recipe here)",
-        type=["json"], key="recipe_upload",
-    )
 
-    if st.button("Apply & Export", type="primary"):
-        warn_exc: PatchWarning | None = None
-        try:
-            final_recipe = json.loads(uploaded_recipe.read()) if uploaded_recipe else recipe_dict
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_out:
-                out_path = tmp_out.name
-            apply_recipe(cand_path, final_recipe, out_path)
-        except PatchWarning as pw:
-            # File was written successfully; stubs were intentionally skipped.
-            warn_exc = pw
-            out_path = pw.output_path
-        except PatchError as e:
-            st.error(f"Patch error: {e}")
-            out_path = None
-        except Exception as e:
-            st.error(f"Unexpected error: {e}")
-            out_path = None
-
-        if out_path and Path(out_path).exists():
-            patched_bytes = Path(out_path).read_bytes()
-            patched_name  = f"{stem}_patched.xlsx"
-
-            # Save to Outputs/ on disk
-            disk_out = OUTPUTS_DIR / patched_name
-            disk_out.write_bytes(patched_bytes)
-
-            if warn_exc:
-                stub_lines = "\n".join(f"• {s}" for s in warn_exc.skipped)
-                st.warning(
-                    f"⚠️ Patch applied — {len(warn_exc.skipped)} stub(s) skipped "
-                    f"(fill in match/replacement manually before re-running):\n\n{stub_lines}"
-                )
+    # Fragment: clicking Apply & Export (or uploading an override recipe)
+    # reruns only this panel, not the whole script with every tab's render
+    # logic and the _analyze cache lookup.
+    @st.fragment
+    def _apply_export_panel(cand_path: str, recipe_dict: dict,
+                            recipe_json: str, stem: str) -> None:
+        st.markdown("### ▶️ Apply Recipe & Export Patched .xlsx")
+        uploaded_recipe = st.file_uploader(
+            "Override recipe JSON (optional — upload your edited recipe here)",
+            type=["json"], key="recipe_upload",
+        )
+
+        if st.button("Apply & Export", type="primary"):
+            warn_exc: PatchWarning | None = None
+            patched_name = f"{stem}_patched.xlsx"
+            recipe_blob = uploaded_recipe.getvalue() if uploaded_recipe else recipe_json.encode()
+            # Content-addressed output: the staged candidate path already
+            # embeds the upload's sha256, so (candidate, recipe) pairs map to
+            # a stable file name and a repeat click with the same inputs
+            # serves the prior output without re-running the patcher.
+            h = hashlib.sha256(f"{cand_path}::".encode() + recipe_blob).hexdigest()[:16]
+            disk_out = OUTPUTS_DIR / f".patched_cache_{h}.xlsx"
+            # Marker written only on a clean apply; a stub-skipping run must
+            # re-run so its warning is reproduced on the next click.
+            ok_marker = disk_out.with_suffix(".xlsx.ok")
+            if disk_out.exists() and ok_marker.exists():
+                out_path = str(disk_out)
+                st.caption("Reusing previously patched output for this candidate + recipe.")
             else:
-                st.success(f"✅ Patch applied — {len(patched_bytes):,} bytes.  "
-                           f"Saved to `{disk_out}`")
+                try:
+                    final_recipe = _loads(recipe_blob) if uploaded_recipe else recipe_dict
+                    # Write straight to Outputs/ — no temp hop, and the patched
+                    # bytes are never slurped into memory just to re-save and
+                    # display them; the download button streams from disk.
+                    apply_recipe(cand_path, final_recipe, str(disk_out))
+                    ok_marker.touch()
+                    out_path = str(disk_out)
+                    # Same bound as the staging cache: keep the newest 16
+                    # patched outputs (and their markers), sweep the rest.
+                    by_age = sorted(OUTPUTS_DIR.glob(".patched_cache_*.xlsx"),
+                                    key=lambda f: f.stat().st_mtime, reverse=True)
+                    for old in by_age[16:]:
+                        for victim in (old, old.with_suffix(".xlsx.ok")):
+                            try:
+                                victim.unlink()
+                            except OSError:
+                                pass
+                except PatchWarning as pw:
+                    # File was written successfully; stubs were intentionally skipped.
+                    warn_exc = pw
+                    out_path = pw.output_path
+                except PatchError as e:
+                    st.error(f"Patch error: {e}")
+                    out_path = None
+                except Exception as e:
+                    st.error(f"Unexpected error: {e}")
+                    out_path = None
+
+            if out_path and Path(out_path).exists():
+                out_file = Path(out_path)
+                patched_size = out_file.stat().st_size
+                # The cache file is dot-prefixed (hidden); keep the familiar
+                # user-visible copy in Outputs/ that the success message and
+                # downstream workflows point at. Hard-link when the filesystem
+                # allows it so the bytes aren't duplicated.
+                friendly = OUTPUTS_DIR / patched_name
+                try:
+                    friendly.unlink(missing_ok=True)
+                    os.link(out_file, friendly)
+                except OSError:
+                    friendly.write_bytes(out_file.read_bytes())
+                out_file = friendly
+
+                if warn_exc:
+                    stub_lines = "\n".join(f"• {s}" for s in warn_exc.skipped)
+                    st.warning(
+                        f"⚠️ Patch applied — {len(warn_exc.skipped)} stub(s) skipped "
+                        f"(fill in match/replacement manually before re-running):\n\n{stub_lines}"
+                    )
+                else:
+                    st.success(f"✅ Patch applied — {patched_size:,} bytes.  "
+                               f"Saved to `{out_file}`")
+
+                st.download_button(
+                    "⬇️ Download patched .xlsx",
+                    out_file.open("rb"),
+                    file_name=patched_name,
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key="dl_patched",
+                )
 
-            st.download_button(
-                "⬇️ Download patched .xlsx",
-                patched_bytes,
-                file_name=patched_name,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                key="dl_patched",
-            )
+    _apply_export_panel(cand_path, recipe_dict, recipe_json, stem)
 
 # ═══════════════════════════════════════════════════════════════════════
 # TAB 6: GRAPH PROBE
@@ -2280,18 +2494,23 @@ Tokens expire after ~1 hour.  For automation, use a service principal with a cli
 
     st.caption("Requires a valid Bearer token with **Files.ReadWrite** scope on the target OneDrive.")
 
-    if not graph_token:
-        st.warning("Enter a **Bearer Token** in the sidebar to enable this feature.")
-    else:
+    # Fragment: the probe click reruns just this panel instead of the
+    # whole script (all tabs plus the analysis cache lookup).
+    @st.fragment
+    def _graph_probe_panel(graph_token: str, probe_mode: str, g_drive: str,
+                           g_item: str, g_share: str, cand_path: str,
+                           cand_name: str) -> None:
+        if not graph_token:
+            st.warning("Enter a **Bearer Token** in the sidebar to enable this feature.")
+            return
         if st.button("🚀 Run Graph Probe", type="primary"):
-            from triage.graph_probe import probe_by_item, probe_by_share_url, probe_upload_and_test
             with st.spinner("Probing Excel for Web via Graph API…"):
                 try:
                     if probe_mode == "Upload & test":
                         result = probe_upload_and_test(
                             graph_token,
                             cand_path,
-                            remote_name=cand_file.name,
+                            remote_name=cand_name,
                             out_root="Outputs/graph_runs",
                         )
                     elif probe_mode == "By drive+item":
@@ -2301,7 +2520,7 @@ Tokens expire after ~1 hour.  For automation, use a service principal with a cli
 
                     if result.success:
                         st.success(f"✅ Graph probe PASSED — {len(result.worksheets)} worksheets visible.")
-                        st.code(json.dumps({"worksheets": result.worksheets}, indent=2), language="json")
+                        st.code(_dumps_indent2({"worksheets": result.worksheets}), language="json")
 
                         # Show a small preview of sheet content if available.
                         if getattr(result, "preview_text", None):
@@ -2315,7 +2534,7 @@ Tokens expire after ~1 hour.  For automation, use a service principal with a cli
 
                                 st.dataframe(pd.DataFrame(result.preview_text))
                             except Exception:
-                                st.code(json.dumps(result.preview_text, indent=2), language="json")
+                                st.code(_dumps_indent2(result.preview_text), language="json")
 
                         if getattr(result, "preview_image", None):
                             try:
@@ -2333,6 +2552,9 @@ Tokens expire after ~1 hour.  For automation, use a service principal with a cli
                 except Exception as ex:
                     st.error(f"Exception during probe: {ex}")
 
+    _graph_probe_panel(graph_token, probe_mode, g_drive, g_item, g_share,
+                       cand_path, cand_file.name)
+
 
 # ═══════════════════════════════════════════════════════════════════════
 # TAB 7: BROWSER EXCEL PROBE
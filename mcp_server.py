@@ -30,23 +30,22 @@ Tools exposed
 from __future__ import annotations
 import json
 import dataclasses
+import functools
 from typing import Optional
 
-from mcp.server.fastmcp import FastMCP
+try:
+    import orjson
+except ImportError:  # optional accelerator; stdlib json is the fallback
+    orjson = None
 
-from triage.agents import (
-    GateCheckAgent,
-    DiffAgent,
-    PatternAgent,
-    RecipeAgent,
-    PatchAgent,
-    GraphProbeAgent,
-    WebExcelBrowserProbeAgent,
-    ExcelDesktopProbeAgent,
-    DVAgent,
-    CFAgent,
-    TriageOrchestrator,
-)
+
+def _loads(data):
+    """JSON decode via orjson when available (~2x stdlib)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+from mcp.server.fastmcp import FastMCP
 
 # ── Server instance ────────────────────────────────────────────────────────────
 mcp = FastMCP(
@@ -60,17 +59,27 @@ mcp = FastMCP(
 )
 
 # ── Shared agent instances (stateless, safe to reuse) ─────────────────────────
-_gate    = GateCheckAgent()
-_diff    = DiffAgent()
-_pattern = PatternAgent()
-_recipe  = RecipeAgent()
-_patch   = PatchAgent()
-_graph   = GraphProbeAgent()
-_web_ui  = WebExcelBrowserProbeAgent()
-_desktop = ExcelDesktopProbeAgent()
-_dv      = DVAgent()
-_cf      = CFAgent()
-_orch    = TriageOrchestrator()
+# Agents are constructed lazily on first use: importing triage.agents drags
+# in the whole triage package (including PIL via the graph probe renderer),
+# which tool-listing clients should not pay for at server startup.
+
+@functools.cache
+def _agents():
+    import triage.agents as agents
+    return agents
+
+
+def _gate():    return _agents().GateCheckAgent()
+def _diff():    return _agents().DiffAgent()
+def _pattern(): return _agents().PatternAgent()
+def _recipe():  return _agents().RecipeAgent()
+def _patch():   return _agents().PatchAgent()
+def _graph():   return _agents().GraphProbeAgent()
+def _web_ui():  return _agents().WebExcelBrowserProbeAgent()
+def _desktop(): return _agents().ExcelDesktopProbeAgent()
+def _dv():      return _agents().DVAgent()
+def _cf():      return _agents().CFAgent()
+def _orch():    return _agents().TriageOrchestrator()
 
 
 # ── Tool definitions ───────────────────────────────────────────────────────────
@@ -90,7 +99,7 @@ def run_gate_checks(candidate_path: str) -> dict:
     dict
         GateReport as a dict: pass_all, failing_gates, samples, triage hints.
     """
-    report = _gate.run(candidate_path)
+    report = _gate().run(candidate_path)
     return report.to_dict()
 
 
@@ -111,7 +120,7 @@ def run_diff(candidate_path: str, repaired_path: str) -> dict:
     dict
         DiffReport: added/removed/changed/unchanged parts with XML diffs.
     """
-    report = _diff.run(candidate_path, repaired_path)
+    report = _diff().run(candidate_path, repaired_path)
     return report.to_dict()
 
 
@@ -132,8 +141,8 @@ def detect_patterns(candidate_path: str, repaired_path: str) -> list:
     list
         List of pattern dicts: name, confidence, description, suggested_patch.
     """
-    diff_report = _diff.run(candidate_path, repaired_path)
-    patterns = _pattern.run(diff_report)
+    diff_report = _diff().run(candidate_path, repaired_path)
+    patterns = _pattern().run(diff_report)
     return [
         {
             "name": p.name,
@@ -170,12 +179,12 @@ def generate_recipe(
         Pretty-printed JSON patch recipe.  Save to a .json file, edit any
         <FILL_IN_...> placeholders, then call apply_patch_recipe.
     """
-    gate = _gate.run(candidate_path)
+    gate = _gate().run(candidate_path)
     patterns = []
     if repaired_path:
-        diff_report = _diff.run(candidate_path, repaired_path)
-        patterns = _pattern.run(diff_report)
-    recipe = _recipe.run(
+        diff_report = _diff().run(candidate_path, repaired_path)
+        patterns = _pattern().run(diff_report)
+    recipe = _recipe().run(
         source_file=candidate_path,
         gate_report=gate,
         patterns=patterns if patterns else None,
@@ -208,13 +217,13 @@ def apply_patch_recipe(
     str
         Path of the written output file.
     """
-    recipe_dict = json.loads(recipe_json)
+    recipe_dict = _loads(recipe_json)
     if output_path is None:
         from pathlib import Path
         src = Path(candidate_path)
         output_path = str(Path("Outputs") / (src.stem + "_patched.xlsx"))
         Path("Outputs").mkdir(exist_ok=True)
-    return _patch.run(candidate_path, recipe_dict, output_path)
+    return _patch().run(candidate_path, recipe_dict, output_path)
 
 
 @mcp.tool()
@@ -240,7 +249,7 @@ def graph_probe(
     dict
         GraphResult: success, step, status_code, worksheets, error.
     """
-    result = _graph.run(token, candidate_path, remote_name)
+    result = _graph().run(token, candidate_path, remote_name)
     return dataclasses.asdict(result)
 
 
@@ -265,7 +274,7 @@ def web_excel_browser_probe(
     """
     import dataclasses
 
-    r = _web_ui.run(
+    r = _web_ui().run(
         url=url,
         out_root=out_root,
         timeout_seconds=timeout_seconds,
@@ -297,7 +306,7 @@ def desktop_excel_probe(
     """
     import dataclasses
 
-    r = _desktop.run(
+    r = _desktop().run(
         candidate_path=candidate_path,
         out_root=out_root,
         visible=visible,
@@ -325,8 +334,8 @@ def extract_data_validation(source_path: str) -> dict:
     dict
         DVSpec as a dict — rules grouped by category with sqref ranges.
     """
-    spec = _dv.extract(source_path)
-    return json.loads(spec.to_json())
+    spec = _dv().extract(source_path)
+    return _loads(spec.to_json())
 
 
 @mcp.tool()
@@ -359,8 +368,8 @@ def apply_data_validation(
         src = Path(source_path)
         output_path = str(Path("Outputs") / (src.stem + "_dv.xlsx"))
         Path("Outputs").mkdir(exist_ok=True)
-    mapping = json.loads(sheet_name_mapping_json) if sheet_name_mapping_json else None
-    return _dv.apply_file(source_path, spec, output_path, sheet_name_mapping=mapping)
+    mapping = _loads(sheet_name_mapping_json) if sheet_name_mapping_json else None
+    return _dv().apply_file(source_path, spec, output_path, sheet_name_mapping=mapping)
 
 
 @mcp.tool()
@@ -380,8 +389,8 @@ def extract_conditional_formatting(source_path: str) -> dict:
     dict
         CFDictionary as a dict — blocks, rules, and DXF style XML.
     """
-    cfd = _cf.extract(source_path)
-    return json.loads(cfd.to_json())
+    cfd = _cf().extract(source_path)
+    return _loads(cfd.to_json())
 
 
 @mcp.tool()
@@ -415,8 +424,8 @@ def apply_conditional_formatting(
         src = Path(source_path)
         output_path = str(Path("Outputs") / (src.stem + "_cf.xlsx"))
         Path("Outputs").mkdir(exist_ok=True)
-    mapping = json.loads(sheet_name_mapping_json) if sheet_name_mapping_json else None
-    return _cf.apply_file(source_path, cfd, output_path, sheet_name_mapping=mapping, mode=mode)
+    mapping = _loads(sheet_name_mapping_json) if sheet_name_mapping_json else None
+    return _cf().apply_file(source_path, cfd, output_path, sheet_name_mapping=mapping, mode=mode)
 
 
 @mcp.tool()
@@ -443,7 +452,7 @@ def run_full_pipeline(
         Keys: gate_report, diff_report, patterns, recipe, recipe_json,
         graph_result.
     """
-    return _orch.run_full_pipeline(candidate_path, repaired_path, token)
+    return _orch().run_full_pipeline(candidate_path, repaired_path, token)
 
 
 # ── Entry point ────────────────────────────────────────────────────────────────
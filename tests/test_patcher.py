@@ -17,7 +17,6 @@ Test matrix
 from __future__ import annotations
 import io
 import zipfile
-import tempfile
 import os
 import pytest
 
@@ -41,30 +40,30 @@ def _make_xlsx(extra_parts: dict[str, bytes] | None = None) -> bytes:
     if extra_parts:
         parts.update(extra_parts)
     buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as z:
+    # ZIP_STORED: deflate overhead dwarfs the ~500 bytes of fixture data, and
+    # nothing here exercises compression.
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as z:
         for name, data in parts.items():
             z.writestr(name, data)
     return buf.getvalue()
 
 
-def _write_tmp(data: bytes) -> str:
-    fd, path = tempfile.mkstemp(suffix=".xlsx")
-    os.close(fd)
-    with open(path, "wb") as f:
-        f.write(data)
-    return path
-
-
 def _read_part(out_path: str, part_name: str) -> bytes:
     with zipfile.ZipFile(out_path, "r") as z:
         return z.read(part_name)
 
 
+@pytest.fixture(scope="session")
+def base_xlsx() -> bytes:
+    """The default fixture workbook, built once per test session."""
+    return _make_xlsx()
+
+
 # ─────────────────────────── test cases ─────────────────────────────────────
 
-def test_t1_clean_recipe_returns_path(tmp_path):
+def test_t1_clean_recipe_returns_path(tmp_path, base_xlsx):
     """T1: Valid literal_replace returns output path with no exception."""
-    src = _write_tmp(_make_xlsx())
+    src = base_xlsx
     out = str(tmp_path / "out.xlsx")
     recipe = {"patches": [{"id": "p01", "part": "xl/worksheets/sheet1.xml",
                             "operation": "literal_replace",
@@ -75,9 +74,9 @@ def test_t1_clean_recipe_returns_path(tmp_path):
     assert b"HELLO" not in _read_part(out, "xl/worksheets/sheet1.xml")
 
 
-def test_t2_review_required_stubs_raise_patch_warning(tmp_path):
+def test_t2_review_required_stubs_raise_patch_warning(tmp_path, base_xlsx):
     """T2: REVIEW_REQUIRED stubs → PatchWarning, output file written."""
-    src = _write_tmp(_make_xlsx())
+    src = base_xlsx
     out = str(tmp_path / "out.xlsx")
     recipe = {"patches": [
         {"id": "pfa66d0", "part": "xl/worksheets/sheet1.xml",
@@ -99,9 +98,9 @@ def test_t2_review_required_stubs_raise_patch_warning(tmp_path):
     assert b"HELLO" in _read_part(out, "xl/worksheets/sheet1.xml")
 
 
-def test_t3_fill_in_stubs_raise_patch_warning(tmp_path):
+def test_t3_fill_in_stubs_raise_patch_warning(tmp_path, base_xlsx):
     """T3: FILL_IN_* placeholder stubs are also treated as stubs."""
-    src = _write_tmp(_make_xlsx())
+    src = base_xlsx
     out = str(tmp_path / "out.xlsx")
     recipe = {"patches": [
         {"id": "p01", "part": "xl/worksheets/sheet1.xml",
@@ -115,9 +114,9 @@ def test_t3_fill_in_stubs_raise_patch_warning(tmp_path):
     assert os.path.exists(out)
 
 
-def test_t4_stubs_plus_real_patch_raises_warning_but_applies_real(tmp_path):
+def test_t4_stubs_plus_real_patch_raises_warning_but_applies_real(tmp_path, base_xlsx):
     """T4: Stubs + real patch → PatchWarning raised AND real patch is applied."""
-    src = _write_tmp(_make_xlsx())
+    src = base_xlsx
     out = str(tmp_path / "out.xlsx")
     recipe = {"patches": [
         {"id": "pStub", "part": "xl/worksheets/sheet1.xml",
@@ -135,9 +134,9 @@ def test_t4_stubs_plus_real_patch_raises_warning_but_applies_real(tmp_path):
         "Real patch must be applied even when stubs are also present"
 
 
-def test_t5_bad_real_match_raises_patch_error(tmp_path):
+def test_t5_bad_real_match_raises_patch_error(tmp_path, base_xlsx):
     """T5: Real literal_replace with non-existent match → PatchError."""
-    src = _write_tmp(_make_xlsx())
+    src = base_xlsx
     out = str(tmp_path / "out.xlsx")
     recipe = {"patches": [
         {"id": "p01", "part": "xl/worksheets/sheet1.xml",
@@ -148,9 +147,9 @@ def test_t5_bad_real_match_raises_patch_error(tmp_path):
         apply_recipe(src, recipe, out)
 
 
-def test_t6_delete_part_removes_entry(tmp_path):
+def test_t6_delete_part_removes_entry(tmp_path, base_xlsx):
     """T6: delete_part removes the ZIP entry."""
-    src = _write_tmp(_make_xlsx())
+    src = base_xlsx
     out = str(tmp_path / "out.xlsx")
     recipe = {"patches": [
         {"id": "p01", "part": "xl/calcChain.xml", "operation": "delete_part"},
@@ -160,9 +159,9 @@ def test_t6_delete_part_removes_entry(tmp_path):
         assert "xl/calcChain.xml" not in z.namelist()
 
 
-def test_t7_mixed_stubs_and_bad_real_match_raises_patch_error(tmp_path):
+def test_t7_mixed_stubs_and_bad_real_match_raises_patch_error(tmp_path, base_xlsx):
     """T7: Stubs + bad real match → PatchError (hard failure wins over warning)."""
-    src = _write_tmp(_make_xlsx())
+    src = base_xlsx
     out = str(tmp_path / "out.xlsx")
     recipe = {"patches": [
         {"id": "pStub", "part": "xl/worksheets/sheet1.xml",
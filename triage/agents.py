@@ -21,10 +21,14 @@ All agents are stateless; instantiate once and call .run() as many times
 as needed.
 """
 from __future__ import annotations
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 
-from triage.gate_checks import run_all as _gate_run_all, GateReport
-from triage.diff import diff_packages, DiffReport
+from triage.gate_checks import run_all as _gate_run_all, run_all_from_parts, GateReport
+from triage.diff import diff_packages, diff_packages_from_parts, DiffReport
+from triage.pkg_cache import PackageParts, load_parts
 from triage.patterns import detect_all, Pattern
 from triage.report import (
     recipe_from_gates,
@@ -415,6 +419,21 @@ class TriageOrchestrator:
         self.recipe_agent  = RecipeAgent()
         self.patch_agent   = PatchAgent()
         self.graph_agent   = GraphProbeAgent()
+        # Inflated-package cache shared by the pipeline phases, keyed on
+        # (path, mtime, size) so a rewritten file invalidates naturally.
+        self._parts_cache: dict[tuple[str, float, int], PackageParts] = {}
+
+    def _cached_parts(self, path: str) -> PackageParts:
+        st = os.stat(path)
+        key = (path, st.st_mtime, st.st_size)
+        pkg = self._parts_cache.get(key)
+        if pkg is None:
+            # Iterative pipelines walk through patched copies; keep only a
+            # handful of inflated packages alive at a time.
+            if len(self._parts_cache) >= 4:
+                self._parts_cache.pop(next(iter(self._parts_cache)))
+            pkg = self._parts_cache[key] = load_parts(path)
+        return pkg
 
     def run_full_pipeline(
         self,
@@ -437,39 +456,66 @@ class TriageOrchestrator:
         """
         summary: dict = {}
 
-        # Phase 1 — gate checks (always)
-        gate = self.gate_agent.run(candidate_path)
-        summary["gate_report"] = gate.to_dict()
-
-        # Phase 2 & 3 — diff + patterns (only if repaired file provided)
-        diff: Optional[DiffReport] = None
-        patterns: List[Pattern] = []
-        if repaired_path:
-            diff = self.diff_agent.run(candidate_path, repaired_path)
-            summary["diff_report"] = diff.to_dict()
-            patterns = self.pattern_agent.run(diff)
-            summary["patterns"] = [
-                {"name": p.name, "confidence": p.confidence,
-                 "description": p.description, "suggested_patch": p.suggested_patch}
-                for p in patterns
-            ]
-        else:
-            summary["diff_report"] = None
-            summary["patterns"] = []
-
-        # Phase 4 — recipe
-        recipe = self.recipe_agent.run(
-            source_file=candidate_path,
-            gate_report=gate,
-            patterns=patterns if patterns else None,
-        )
-        summary["recipe"] = recipe.to_dict()
-        summary["recipe_json"] = recipe.to_json()
-
-        # Phase 6 — graph probe (only if token provided)
+        # Phase 6 starts first: the Graph probe is network-bound and has no
+        # dependency on the local phases, so its upload and polling overlap
+        # the CPU work below instead of waiting for it.
+        probe_future = None
+        executor = None
         if token:
+            executor = ThreadPoolExecutor(max_workers=1)
+            probe_future = executor.submit(self.graph_agent.run, token, candidate_path)
+
+        # If a local phase raises, the already-submitted probe must not keep
+        # running (and completing its upload side effect) behind the
+        # exception: cancel it if it has not started, and release the
+        # executor either way.
+        try:
+            # Phase 1 — gate checks (always). The inflated candidate is cached so
+            # phase 2 reuses it instead of decompressing the archive again.
+            gate = run_all_from_parts(self._cached_parts(candidate_path))
+            summary["gate_report"] = gate.to_dict()
+
+            # Phase 2 & 3 — diff + patterns (only if repaired file provided)
+            diff: Optional[DiffReport] = None
+            patterns: List[Pattern] = []
+            if repaired_path:
+                diff = diff_packages_from_parts(
+                    self._cached_parts(candidate_path),
+                    self._cached_parts(repaired_path),
+                )
+                summary["diff_report"] = diff.to_dict()
+                patterns = self.pattern_agent.run(diff)
+                summary["patterns"] = [
+                    {"name": p.name, "confidence": p.confidence,
+                     "description": p.description, "suggested_patch": p.suggested_patch}
+                    for p in patterns
+                ]
+            else:
+                summary["diff_report"] = None
+                summary["patterns"] = []
+
+            # Phase 4 — recipe
+            recipe = self.recipe_agent.run(
+                source_file=candidate_path,
+                gate_report=gate,
+                patterns=patterns if patterns else None,
+            )
+            # One dict walk: to_json would rebuild the dict to_dict just produced.
+            summary["recipe"] = recipe.to_dict()
+            summary["recipe_json"] = json.dumps(summary["recipe"], indent=2)
+        except BaseException:
+            if executor is not None:
+                probe_future.cancel()
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        # Phase 6 — graph probe result (started before phase 1)
+        if probe_future is not None:
             import dataclasses
-            gr = self.graph_agent.run(token, candidate_path)
+            try:
+                gr = probe_future.result()
+            finally:
+                executor.shutdown(wait=False)
             summary["graph_result"] = dataclasses.asdict(gr)
         else:
             summary["graph_result"] = None
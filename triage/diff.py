@@ -7,11 +7,11 @@ No reserialization; all operations are byte/string level.
 """
 from __future__ import annotations
 import difflib
-import zipfile
+import itertools
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
-from triage.scanner import scan, ScanResult
+from triage.scanner import _sha256
 
 
 @dataclass
@@ -78,69 +78,100 @@ class DiffReport:
         }
 
 
+# Parts larger than this are not text-diffed: decoding and LCS-matching a
+# multi-MB sheet costs far more than the 200-line snippet is worth.
+XML_DIFF_BYTE_LIMIT = 512 * 1024
+
+
 def _xml_diff(a_bytes: bytes, b_bytes: bytes, context: int = 4, max_lines: int = 200) -> str:
-    a_lines = a_bytes.decode("utf-8", errors="ignore").splitlines()
-    b_lines = b_bytes.decode("utf-8", errors="ignore").splitlines()
-    diff = list(difflib.unified_diff(a_lines, b_lines, lineterm="", n=context))
+    # Diff at the bytes level and decode only the lines that end up in the
+    # truncated output: decoding both full documents allocated two str
+    # copies of each part even when the diff stops at 200 lines.
+    a_lines = a_bytes.splitlines()
+    b_lines = b_bytes.splitlines()
+    # unified_diff is a generator: consume only one line past the budget
+    # instead of materializing every hunk and then throwing most away.
+    diff_iter = difflib.diff_bytes(difflib.unified_diff, a_lines, b_lines,
+                                   lineterm=b"", n=context)
+    diff = [ln.decode("utf-8", errors="ignore")
+            for ln in itertools.islice(diff_iter, max_lines + 1)]
     if len(diff) > max_lines:
         diff = diff[:max_lines] + [f"... diff truncated at {max_lines} lines ..."]
     return "\n".join(diff)
 
 
-def _read(path: str, name: str) -> bytes:
-    with zipfile.ZipFile(path, "r") as z:
-        return z.read(name)
-
-
 def diff_packages(candidate_path: str, repaired_path: str) -> DiffReport:
     """
     Compare candidate vs repaired at the ZIP-entry level.
     Returns a DiffReport with per-part status + XML diff snippets.
     """
-    cand_scan: ScanResult = scan(candidate_path)
-    rep_scan: ScanResult = scan(repaired_path)
+    from triage.pkg_cache import load_parts
+    return diff_packages_from_parts(load_parts(candidate_path), load_parts(repaired_path))
 
-    cand_map = {p.name: p for p in cand_scan.parts}
-    rep_map = {p.name: p for p in rep_scan.parts}
 
-    all_names = sorted(set(cand_map) | set(rep_map))
+def diff_packages_from_parts(cand_pkg, rep_pkg) -> DiffReport:
+    """
+    Diff two already-inflated packages (triage.pkg_cache.PackageParts).
+
+    Equality is decided CRC-first: differing central-directory CRCs (or
+    sizes) prove a part changed without touching its bytes, and CRC-equal
+    parts are confirmed with a direct bytes compare. SHA-256 is computed
+    only for parts that appear in the report (added/removed/changed), so the
+    common mostly-unchanged workbook skips hashing almost everything.
+    """
+    candidate_path = cand_pkg.path
+    repaired_path = rep_pkg.path
+    cand_parts = cand_pkg.parts
+    rep_parts = rep_pkg.parts
+    cand_crcs = cand_pkg.crcs if getattr(cand_pkg, "crcs", None) else None
+    rep_crcs = rep_pkg.crcs if getattr(rep_pkg, "crcs", None) else None
+
+    all_names = sorted(cand_parts.keys() | rep_parts.keys())
     report = DiffReport(candidate_path=candidate_path, repaired_path=repaired_path)
 
     for name in all_names:
-        in_cand = name in cand_map
-        in_rep = name in rep_map
+        a = cand_parts.get(name)
+        b = rep_parts.get(name)
 
-        if in_cand and not in_rep:
-            cp = cand_map[name]
+        if b is None:
             report.parts.append(PartDelta(
                 name=name, status="removed",
-                candidate_size=cp.size, candidate_sha256=cp.sha256,
+                candidate_size=len(a), candidate_sha256=_sha256(a),
             ))
-        elif in_rep and not in_cand:
-            rp = rep_map[name]
+        elif a is None:
             report.parts.append(PartDelta(
                 name=name, status="added",
-                repaired_size=rp.size, repaired_sha256=rp.sha256,
+                repaired_size=len(b), repaired_sha256=_sha256(b),
             ))
         else:
-            cp, rp = cand_map[name], rep_map[name]
-            if cp.sha256 == rp.sha256:
+            if cand_crcs is not None and rep_crcs is not None:
+                same = (cand_crcs.get(name) == rep_crcs.get(name)
+                        and len(a) == len(b) and a == b)
+            else:
+                same = a == b
+            if same:
+                # No hash for unchanged parts: nothing serializes it (to_dict
+                # only lists shas for changed entries) and they are the bulk
+                # of a typical workbook.
                 report.parts.append(PartDelta(
                     name=name, status="unchanged",
-                    candidate_size=cp.size, repaired_size=rp.size,
-                    candidate_sha256=cp.sha256, repaired_sha256=rp.sha256,
+                    candidate_size=len(a), repaired_size=len(b),
                 ))
             else:
                 xml_diff_txt = None
                 if name.lower().endswith(".xml"):
-                    a_raw = _read(candidate_path, name)
-                    b_raw = _read(repaired_path, name)
-                    xml_diff_txt = _xml_diff(a_raw, b_raw)
+                    if max(len(a), len(b)) > XML_DIFF_BYTE_LIMIT:
+                        xml_diff_txt = (
+                            f"... diff skipped: part too large "
+                            f"({len(a)} vs {len(b)} bytes, limit {XML_DIFF_BYTE_LIMIT}) ..."
+                        )
+                    else:
+                        xml_diff_txt = _xml_diff(a, b)
                 report.parts.append(PartDelta(
                     name=name, status="changed",
-                    candidate_size=cp.size, repaired_size=rp.size,
-                    size_delta=rp.size - cp.size,
-                    candidate_sha256=cp.sha256, repaired_sha256=rp.sha256,
+                    candidate_size=len(a), repaired_size=len(b),
+                    size_delta=len(b) - len(a),
+                    candidate_sha256=_sha256(a), repaired_sha256=_sha256(b),
                     xml_diff=xml_diff_txt,
                 ))
 
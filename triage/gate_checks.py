@@ -20,6 +20,16 @@ STOPSHIP_TOKENS = ("_xlfn.", "_xludf.", "_xlpm.", "AGGREGATE(")
 ERROR_LITERAL_TOKENS = ("#REF!", "#VALUE!", "#NAME?")
 RC_CF_PATTERN = re.compile(r"\bRC\d+\b")
 
+# Precompiled once at import: these run per cell / per formula attribute in
+# the shared-formula scan, which is the hottest loop in the gate battery.
+_CELL_REF = re.compile(r'<c\b[^>]*\br="([A-Z]+\d+)"')
+_F_TAG = re.compile(r'<f\b([^>]*)>', re.DOTALL)
+_SI_DQ = re.compile(r'\bsi="(\d+)"')
+_SI_SQ = re.compile(r"\bsi='(\d+)'")
+_REF_DQ = re.compile(r'\bref="([^"]+)"')
+_REF_SQ = re.compile(r"\bref='([^']+)'")
+_A1_REF = re.compile(r'^([A-Z]+)(\d+)$')
+
 
 # ─────────────────────────── helpers ────────────────────────────
 
@@ -173,8 +183,6 @@ def _iter_cells(xml: str):
     Yield (cell_ref, f_attrs_string) for every shared-formula cell.
     Uses split on '</c>' to avoid catastrophic backtracking on large sheets.
     """
-    _CELL_REF = re.compile(r'<c\b[^>]*\br="([A-Z]+\d+)"')
-    _F_TAG    = re.compile(r'<f\b([^>]*)>', re.DOTALL)
     for chunk in xml.split("</c>"):
         # Find the last <c ...> opening in this chunk
         cell_m = None
@@ -202,12 +210,12 @@ def check_shared_ref(z: zipfile.ZipFile) -> tuple[List[dict], List[dict]]:
         for cell, fa in _iter_cells(s):
             if 't="shared"' not in fa and "t='shared'" not in fa:
                 continue
-            si_m = re.search(r'\bsi="(\d+)"', fa) or re.search(r"\bsi='(\d+)'", fa)
+            si_m = _SI_DQ.search(fa) or _SI_SQ.search(fa)
             if not si_m:
                 continue
             si = si_m.group(1)
             si_cells[si].append(cell)
-            ref_m = re.search(r'\bref="([^"]+)"', fa) or re.search(r"\bref='([^']+)'", fa)
+            ref_m = _REF_DQ.search(fa) or _REF_SQ.search(fa)
             if ref_m:
                 si_decl[si] = ref_m.group(1)
         for si, ref in si_decl.items():
@@ -220,9 +228,8 @@ def check_shared_ref(z: zipfile.ZipFile) -> tuple[List[dict], List[dict]]:
             pr = _parse_ref(si_decl[si])
             if not pr:
                 continue
-            nums = [(_col_to_num(re.match(r'^([A-Z]+)(\d+)$', c).group(1)),
-                     int(re.match(r'^([A-Z]+)(\d+)$', c).group(2)))
-                    for c in cells if re.match(r'^([A-Z]+)(\d+)$', c)]
+            nums = [(_col_to_num(m.group(1)), int(m.group(2)))
+                    for c in cells if (m := _A1_REF.match(c))]
             if not nums:
                 continue
             cmin = min(n[0] for n in nums); cmax = max(n[0] for n in nums)
@@ -417,20 +424,30 @@ class GateReport:
 
 def run_all(path: str) -> GateReport:
     """Run the full gate battery against *path*. Returns a GateReport."""
-    rpt = GateReport(path=path)
-    with zipfile.ZipFile(path, "r") as z:
-        rpt.stopship = check_stopship_tokens(z)
-        rpt.cf_ref = check_cf_ref_hits(z)
-        rpt.tablecolumn_lf = check_tablecolumn_lf(z)
-        rpt.calcchain_invalid = check_calcchain_invalid(z)
-        rpt.shared_ref_oob, rpt.shared_ref_bbox = check_shared_ref(z)
-        rpt.styles_dxf = check_styles_dxf(z)
-        rpt.cf_policy_deploymenttracker = check_cf_policy_deploymenttracker(z)
-        rpt.xml_wellformed = check_xml_wellformed(z)
-        rpt.illegal_control = check_illegal_control_chars(z)
-        rpt.rels_missing = check_rels_missing(z)
-        rpt.duplicate_table_names = check_duplicate_table_names(z)
-        rpt.rc_formula_refs = check_rc_formula_refs(z)
-        rpt.activetab = check_workbook_activetab(z)
+    from triage.pkg_cache import load_parts
+    return run_all_from_parts(load_parts(path))
+
+def run_all_from_parts(z) -> GateReport:
+    """
+    Run the full gate battery against an already-inflated package.
+
+    *z* is a triage.pkg_cache.PackageParts (or any object exposing the
+    namelist/read subset of zipfile.ZipFile), so callers that also diff or
+    pattern-scan the same file can share one decompression pass.
+    """
+    rpt = GateReport(path=z.path)
+    rpt.stopship = check_stopship_tokens(z)
+    rpt.cf_ref = check_cf_ref_hits(z)
+    rpt.tablecolumn_lf = check_tablecolumn_lf(z)
+    rpt.calcchain_invalid = check_calcchain_invalid(z)
+    rpt.shared_ref_oob, rpt.shared_ref_bbox = check_shared_ref(z)
+    rpt.styles_dxf = check_styles_dxf(z)
+    rpt.cf_policy_deploymenttracker = check_cf_policy_deploymenttracker(z)
+    rpt.xml_wellformed = check_xml_wellformed(z)
+    rpt.illegal_control = check_illegal_control_chars(z)
+    rpt.rels_missing = check_rels_missing(z)
+    rpt.duplicate_table_names = check_duplicate_table_names(z)
+    rpt.rc_formula_refs = check_rc_formula_refs(z)
+    rpt.activetab = check_workbook_activetab(z)
     return rpt
 
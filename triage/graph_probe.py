@@ -24,9 +24,9 @@ import base64
 import datetime
 import json
 import os
-import urllib.error
+import http.client
+import threading
 import urllib.parse
-import urllib.request
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -136,6 +136,54 @@ def _render_preview_png(preview_text: List[List[str]], out_path: Path) -> Option
     return str(out_path)
 
 
+# Keep-alive connection pool. A probe issues a dozen-plus Graph calls back to
+# back; reusing one HTTPS connection per host skips the TCP+TLS handshake on
+# every call after the first while staying stdlib-only.
+_CONN_LOCK = threading.Lock()
+_CONNS: Dict[str, http.client.HTTPSConnection] = {}
+_MAX_REDIRECTS = 3
+
+
+def _request(method: str, url: str, headers: Dict[str, str], data: bytes | None,
+             _redirects: int = 0) -> tuple[int, bytes]:
+    """Issue one HTTPS request, reusing a pooled keep-alive connection per host."""
+    parts = urllib.parse.urlsplit(url)
+    selector = parts.path + (f"?{parts.query}" if parts.query else "")
+    for attempt in (0, 1):
+        with _CONN_LOCK:
+            conn = _CONNS.pop(parts.netloc, None)
+        if conn is None:
+            conn = http.client.HTTPSConnection(parts.netloc, timeout=120)
+        try:
+            conn.request(method, selector, body=data, headers=headers)
+            resp = conn.getresponse()
+            raw = resp.read()
+            status = resp.status
+            location = resp.getheader("Location")
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if attempt:
+                raise
+            continue  # stale keep-alive connection; retry once on a fresh one
+        with _CONN_LOCK:
+            _CONNS.setdefault(parts.netloc, conn)
+        if status in (301, 302, 303, 307, 308) and location and _redirects < _MAX_REDIRECTS:
+            if status == 303 or (status in (301, 302) and method == "POST"):
+                return _request("GET", location, headers, None, _redirects + 1)
+            return _request(method, location, headers, data, _redirects + 1)
+        return status, raw
+    raise RuntimeError("unreachable")  # pragma: no cover
+
+
+def _json_request(method: str, url: str, headers: Dict[str, str], data: bytes | None) -> tuple[int, dict]:
+    status, raw = _request(method, url, headers, data)
+    try:
+        payload = json.loads(raw.decode("utf-8", errors="ignore") or "{}")
+    except Exception:
+        payload = {"raw": raw.decode("utf-8", errors="ignore")}
+    return status, payload
+
+
 def _api(method: str, url: str, token: str, body=None, extra_headers: dict | None = None) -> tuple[int, dict]:
     data = None
     headers: Dict[str, str] = {
@@ -147,18 +195,7 @@ def _api(method: str, url: str, token: str, body=None, extra_headers: dict | Non
     if body is not None:
         data = json.dumps(body).encode("utf-8")
         headers["Content-Type"] = "application/json"
-    req = urllib.request.Request(url, data=data, headers=headers, method=method)
-    try:
-        with urllib.request.urlopen(req) as resp:
-            raw = resp.read()
-            return resp.getcode(), json.loads(raw.decode("utf-8", errors="ignore") or "{}")
-    except urllib.error.HTTPError as e:
-        raw = e.read()
-        try:
-            payload = json.loads(raw.decode("utf-8", errors="ignore"))
-        except Exception:
-            payload = {"raw": raw.decode("utf-8", errors="ignore")}
-        return e.code, payload
+    return _json_request(method, url, headers, data)
 
 
 def _upload(token: str, file_path: str, remote_name: str) -> tuple[int, dict]:
@@ -170,18 +207,7 @@ def _upload(token: str, file_path: str, remote_name: str) -> tuple[int, dict]:
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     }
-    req = urllib.request.Request(url, data=data, headers=headers, method="PUT")
-    try:
-        with urllib.request.urlopen(req) as resp:
-            raw = resp.read()
-            return resp.getcode(), json.loads(raw.decode("utf-8", errors="ignore") or "{}")
-    except urllib.error.HTTPError as e:
-        raw = e.read()
-        try:
-            payload = json.loads(raw.decode("utf-8", errors="ignore"))
-        except Exception:
-            payload = {"raw": raw.decode("utf-8", errors="ignore")}
-        return e.code, payload
+    return _json_request("PUT", url, headers, data)
 
 
 def probe_by_item(
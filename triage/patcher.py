@@ -217,16 +217,21 @@ def _strip_rels_entry(parts: Dict[str, bytes], deleted_part: str) -> None:
 
 
 def apply_recipe(
-    source_path: str,
+    source_path: str | bytes | io.BytesIO,
     recipe: Dict[str, Any],
     output_path: Optional[str] = None,
 ) -> str:
     """
     Apply all patches in *recipe* to *source_path*, write result to *output_path*.
     Returns the output path used.
+
+    *source_path* may also be raw .xlsx bytes or a binary file-like object,
+    in which case no source file is touched and *output_path* is required.
     """
+    in_memory = not isinstance(source_path, str)
+
     # Folder policy: Active/ is read-only (golden standards).
-    if is_active_path(source_path):
+    if not in_memory and is_active_path(source_path):
         raise PatchError(
             "ENDEAVOR: Apply patch recipe — refused. "
             "Active/ is read-only (golden standards). "
@@ -234,6 +239,8 @@ def apply_recipe(
         )
 
     if output_path is None:
+        if in_memory:
+            raise PatchError("apply_recipe: output_path is required for in-memory sources.")
         src = Path(source_path)
         output_path = str(src.with_stem(src.stem + "_patched"))
 
@@ -245,8 +252,9 @@ def apply_recipe(
         )
 
     # Load all parts into memory first (avoid mid-write conflicts)
+    source = io.BytesIO(source_path) if isinstance(source_path, bytes) else source_path
     parts: Dict[str, bytes] = {}
-    with zipfile.ZipFile(source_path, "r") as z:
+    with zipfile.ZipFile(source, "r") as z:
         for name in z.namelist():
             parts[name] = z.read(name)
 
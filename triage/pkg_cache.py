@@ -0,0 +1,42 @@
+"""
+Decompress-once package cache.
+
+`run_all` and `diff_packages` each used to open the .xlsx themselves and
+re-inflate parts on every read, so analysing one upload decompressed the
+same archive several times over. `load_parts` inflates every part exactly
+once into a `PackageParts` mapping that mimics the two `zipfile.ZipFile`
+methods the gate checks use (`namelist` / `read`), letting all phases share
+a single decompression pass.
+"""
+from __future__ import annotations
+import zipfile
+from typing import Dict, List
+
+
+class PackageParts:
+    """In-memory view of a package: part name -> raw bytes."""
+
+    def __init__(self, path: str, parts: Dict[str, bytes],
+                 crcs: Dict[str, int] | None = None):
+        self.path = path
+        self.parts = parts
+        # Per-entry CRC32 from the zip central directory; lets the diff
+        # prove two parts unequal without hashing or comparing their bytes.
+        self.crcs = crcs or {}
+        self._names = list(parts)
+
+    # zipfile.ZipFile-compatible surface (the subset the gate checks use)
+    def namelist(self) -> List[str]:
+        return self._names
+
+    def read(self, name: str) -> bytes:
+        return self.parts[name]
+
+
+def load_parts(path: str) -> PackageParts:
+    """Inflate every part of *path* once and return the in-memory view."""
+    with zipfile.ZipFile(path, "r") as z:
+        infos = z.infolist()
+        return PackageParts(path,
+                            {i.filename: z.read(i.filename) for i in infos},
+                            {i.filename: i.CRC for i in infos})
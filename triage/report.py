@@ -33,6 +33,8 @@ class PatchOp:
     position: str = "before"  # before | after
     # set_part
     content: Optional[str] = None
+    # True when the op still carries a placeholder a human must fill in
+    needs_review: bool = False
 
     def to_dict(self) -> dict:
         d: Dict[str, Any] = {
@@ -51,6 +53,8 @@ class PatchOp:
             d["position"] = self.position
         elif self.operation == "set_part":
             d["content"] = self.content
+        if self.needs_review:
+            d["needs_review"] = True
         return d
 
 
@@ -160,6 +164,7 @@ def recipe_from_gates(gate: GateReport) -> PatchRecipe:
                          "Set match/replacement manually after inspecting the part.",
             match="<FILL_IN_LINEFEED_VALUE>",
             replacement="<FILL_IN_CLEAN_VALUE>",
+            needs_review=True,
         ))
 
     return recipe
@@ -295,6 +300,7 @@ def recipe_from_patterns(
                         description=f"[CF_DXFID_CLONE] {p.description} — Manual review required.",
                         match="<REVIEW_REQUIRED>",
                         replacement="<REVIEW_REQUIRED>",
+                        needs_review=True,
                     ))
 
         elif p.name in ("SHARED_REF_TRIM", "TABLE_STYLE_NORM",
@@ -308,6 +314,7 @@ def recipe_from_patterns(
                                   "Set match/replacement from the XML diff.",
                     match="<REVIEW_REQUIRED>",
                     replacement="<REVIEW_REQUIRED>",
+                    needs_review=True,
                 ))
     return recipe
 